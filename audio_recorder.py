@@ -1,6 +1,7 @@
 """
 Audio recording functionality for the VoiceBot application.
-Handles real-time audio recording using sounddevice.
+Handles real-time audio recording using sounddevice, with voice activity
+detection for hands-free conversations.
 """
 
 import threading
@@ -8,7 +9,62 @@ import queue
 import time
 import numpy as np
 import sounddevice as sd
-from config import SAMPLE_RATE, CHANNELS
+from config import (
+    SAMPLE_RATE,
+    CHANNELS,
+    MAX_RECORDING_SECONDS,
+    VAD_RMS_THRESHOLD,
+    VAD_MIN_SPEECH_SECONDS,
+    VAD_END_SILENCE_SECONDS,
+    VAD_PREROLL_SECONDS,
+)
+
+
+class VoiceActivityDetector:
+    """Energy-based detector for the start and end of an utterance."""
+
+    def __init__(self, threshold=VAD_RMS_THRESHOLD, min_speech_seconds=VAD_MIN_SPEECH_SECONDS,
+                 end_silence_seconds=VAD_END_SILENCE_SECONDS, max_speech_seconds=MAX_RECORDING_SECONDS):
+        self.threshold = threshold
+        self.min_speech = int(min_speech_seconds * SAMPLE_RATE)
+        self.end_silence = int(end_silence_seconds * SAMPLE_RATE)
+        self.max_speech = int(max_speech_seconds * SAMPLE_RATE)
+        self.samples_seen = 0
+        self.voiced_run = 0
+        self.silence_run = 0
+        self.speech_start_sample = None
+        self.speech_end_sample = None
+        self.speech_started_at = None
+        self.speech_ended_at = None
+        self._changed = threading.Event()
+
+    def process(self, chunk):
+        """Update the detector with one block of samples from the audio callback."""
+        frames = len(chunk)
+        voiced = float(np.sqrt(np.mean(np.square(chunk)))) >= self.threshold
+        now = time.perf_counter()
+
+        if self.speech_start_sample is None:
+            self.voiced_run = self.voiced_run + frames if voiced else 0
+            if self.voiced_run >= self.min_speech:
+                # Date the onset back to the first voiced block, not the moment it was confirmed
+                self.speech_start_sample = self.samples_seen + frames - self.voiced_run
+                self.speech_started_at = now - self.voiced_run / SAMPLE_RATE
+                self._changed.set()
+        elif self.speech_end_sample is None:
+            self.silence_run = 0 if voiced else self.silence_run + frames
+            spoken = self.samples_seen + frames - self.speech_start_sample
+            if self.silence_run >= self.end_silence or spoken >= self.max_speech:
+                self.speech_end_sample = self.samples_seen + frames - self.silence_run
+                self.speech_ended_at = now - self.silence_run / SAMPLE_RATE
+                self._changed.set()
+
+        self.samples_seen += frames
+
+    def wait(self, timeout):
+        """Block until speech starts or ends, or the timeout passes."""
+        self._changed.wait(timeout)
+        self._changed.clear()
 
 
 class AudioRecorder:
@@ -18,12 +74,28 @@ class AudioRecorder:
         self.audio_queue = queue.Queue()
         self.is_recording = False
         self.audio_thread = None
+        self.vad = None
+        self.discarded_samples = 0  # Samples dropped from the front of the queue while waiting for speech
 
     def callback(self, indata, frames, time, status):
         """Callback function for audio input stream."""
         if status:
             print(f'Error in audio callback: {status}')
         self.audio_queue.put(indata.copy())
+        if self.vad is not None:
+            self.vad.process(indata)
+            if self.vad.speech_start_sample is None:
+                self._trim_to_preroll()
+
+    def _trim_to_preroll(self):
+        """While waiting for speech, keep only the blocks a pre-roll (and a pending onset) needs."""
+        keep = int(VAD_PREROLL_SECONDS * SAMPLE_RATE) + self.vad.voiced_run
+        blocks = self.audio_queue.queue
+        buffered = self.vad.samples_seen - self.discarded_samples
+        while len(blocks) > 1 and buffered - len(blocks[0]) >= keep:
+            dropped = len(self.audio_queue.get_nowait())
+            buffered -= dropped
+            self.discarded_samples += dropped
 
     def start_recording(self):
         """Start audio recording in a separate thread."""
@@ -52,3 +124,39 @@ class AudioRecorder:
         if audio_chunks:
             return np.concatenate(audio_chunks)
         return None
+
+    @property
+    def listening(self):
+        """True while recording in hands-free mode."""
+        return self.is_recording and self.vad is not None
+
+    def start_listening(self):
+        """Start recording with voice activity detection for a hands-free turn."""
+        self.vad = VoiceActivityDetector()
+        self.discarded_samples = 0
+        self.start_recording()
+
+    def stop_listening(self):
+        """Stop a hands-free recording without keeping the audio."""
+        self.stop_recording()
+        self.vad = None
+        self.release_buffers()
+
+    def take_utterance(self, preroll_seconds=VAD_PREROLL_SECONDS):
+        """Stop listening and return only the detected utterance (plus a short pre-roll), or None."""
+        vad, self.vad = self.vad, None
+        audio_data = self.stop_recording()
+        discarded = self.discarded_samples
+        self.release_buffers()
+        if audio_data is None or vad is None or vad.speech_start_sample is None:
+            return None
+        # Sample positions count from the start of listening; the queue starts after the dropped blocks
+        start = max(0, vad.speech_start_sample - int(preroll_seconds * SAMPLE_RATE) - discarded)
+        end = vad.speech_end_sample - discarded if vad.speech_end_sample is not None else None
+        return audio_data[start:end]
+
+    def release_buffers(self):
+        """Drop buffered audio and the finished thread between turns."""
+        self.audio_queue = queue.Queue()
+        self.audio_thread = None
+        self.discarded_samples = 0
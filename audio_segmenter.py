@@ -0,0 +1,95 @@
+"""
+Audio segmentation for long transcriptions in the VoiceBot application.
+Splits audio at silences into overlapping windows and merges the per-window
+verbose_json transcripts back onto a single timeline.
+"""
+
+import numpy as np
+from config import (
+    STT_SEGMENT_SECONDS,
+    STT_SEGMENT_OVERLAP_SECONDS,
+    STT_SEGMENT_SEARCH_SECONDS,
+)
+
+FRAME_SECONDS = 0.03
+
+
+def _quietest_frame(samples, start, end, frame):
+    """Return the sample index of the lowest-energy frame in samples[start:end]."""
+    region = samples[start:end]
+    frames = len(region) // frame
+    if frames == 0:
+        return end
+    energy = np.sqrt(np.mean(region[:frames * frame].reshape(frames, frame) ** 2, axis=1))
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+
+def split_at_silences(samples, sample_rate, window_seconds=STT_SEGMENT_SECONDS,
+                      overlap_seconds=STT_SEGMENT_OVERLAP_SECONDS,
+                      search_seconds=STT_SEGMENT_SEARCH_SECONDS):
+    """Split mono samples into overlapping windows cut at the quietest nearby point.
+
+    Returns a list of dicts with the window's sample range ("start", "end") and the
+    region it owns on the global timeline ("own_start", "own_end", in seconds). Owned
+    regions tile the audio without gaps, so each transcript segment is kept by exactly
+    one window when merging.
+    """
+    total = len(samples)
+    window = int(window_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+
+    cuts = [0]
+    while total - cuts[-1] > window:
+        target = cuts[-1] + window
+        cuts.append(_quietest_frame(samples, max(cuts[-1] + frame, target - search), target, frame))
+    cuts.append(total)
+
+    windows = []
+    for own_start, own_end in zip(cuts[:-1], cuts[1:]):
+        windows.append({
+            "start": max(0, own_start - overlap),
+            "end": min(total, own_end + overlap),
+            "own_start": own_start / sample_rate,
+            "own_end": own_end / sample_rate,
+        })
+    return windows
+
+
+def merge_transcripts(windows, responses, sample_rate):
+    """Merge per-window verbose_json responses into one transcript with global timestamps.
+
+    Segments are shifted by their window offset and kept only if their midpoint falls
+    inside the window's owned region, which drops the duplicates from overlaps. A window
+    that returns text without segments counts as one segment spanning its owned region.
+    """
+    merged = []
+    for window, response in zip(windows, responses):
+        offset = window["start"] / sample_rate
+        segments = response.get("segments") or []
+        if not segments:
+            # No timestamps to dedup with; keep the window's text as-is
+            text = response.get("text", "").strip()
+            if text:
+                merged.append({
+                    "id": len(merged),
+                    "start": window["own_start"],
+                    "end": window["own_end"],
+                    "text": text,
+                })
+            continue
+        for segment in segments:
+            start = segment["start"] + offset
+            end = segment["end"] + offset
+            midpoint = (start + end) / 2
+            if window["own_start"] <= midpoint < window["own_end"]:
+                merged.append({**segment, "id": len(merged), "start": start, "end": end})
+
+    text = " ".join(s["text"].strip() for s in merged)
+    return {
+        "text": text,
+        "segments": merged,
+        "duration": windows[-1]["own_end"] if windows else 0.0,
+        "language": responses[0].get("language") if responses else None,
+    }
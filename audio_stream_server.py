@@ -0,0 +1,161 @@
+"""
+Progressive audio streaming for the VoiceBot application.
+Serves TTS audio to the browser as chunked HTTP while it is still being synthesized.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import (
+    TTS_STREAM_HOST,
+    TTS_STREAM_PORT,
+    TTS_STREAM_PUBLIC_URL,
+    TTS_STREAM_MAX_STREAMS,
+)
+
+
+class AudioStream:
+    """Append-only buffer of audio chunks that readers can follow while it grows."""
+
+    def __init__(self, content_type="audio/mpeg"):
+        self.stream_id = uuid.uuid4().hex
+        self.content_type = content_type
+        self.chunks = []
+        self.done = False
+        self.failed = False
+        self.cancelled = False
+        self.first_byte_at = None
+        self.first_byte_seconds = None
+        self.total_seconds = None
+        self._condition = threading.Condition()
+
+    def append(self, chunk):
+        """Add a chunk and wake up any waiting readers."""
+        with self._condition:
+            self.chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self, failed=False):
+        """Mark the stream as complete and return True if it was cancelled first."""
+        with self._condition:
+            self.done = True
+            self.failed = failed
+            self._condition.notify_all()
+            return self.cancelled
+
+    def cancel(self):
+        """Ask the producer to stop; return False if the stream had already finished.
+
+        Listeners get whatever was already sent.
+        """
+        with self._condition:
+            if self.done:
+                return False
+            self.cancelled = True
+            return True
+
+    def wait_for_first_chunk(self, timeout=None):
+        """Block until the first chunk arrives or the stream ends. Returns True if audio is available."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.chunks or self.done, timeout=timeout)
+            return bool(self.chunks)
+
+    def wait_until_done(self, timeout=None):
+        """Block until the producer has finished writing the stream."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.done, timeout=timeout)
+
+    def iter_chunks(self):
+        """Yield chunks from the beginning, blocking for new ones until the stream is done."""
+        index = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: index < len(self.chunks) or self.done)
+                pending = self.chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index >= len(self.chunks):
+                return
+
+
+class _AudioStreamHandler(BaseHTTPRequestHandler):
+    """Serves registered streams at /tts/<stream_id> using chunked transfer encoding."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        stream_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+        stream = self.server.audio_streams.get(stream_id)
+        if stream is None:
+            self.send_error(404, "Unknown audio stream")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", stream.content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        try:
+            for chunk in stream.iter_chunks():
+                self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Browser stopped listening (e.g. a rerun replaced the player)
+
+    def log_message(self, format, *args):
+        pass  # Keep the Streamlit console free of per-request noise
+
+
+class AudioStreamServer:
+    """Background HTTP server holding the most recent audio streams."""
+
+    def __init__(self, host=TTS_STREAM_HOST, port=TTS_STREAM_PORT,
+                 public_url=TTS_STREAM_PUBLIC_URL, max_streams=TTS_STREAM_MAX_STREAMS):
+        self.public_url = (public_url or f"http://localhost:{port}").rstrip("/")
+        self.max_streams = max_streams
+        self.streams = OrderedDict()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _AudioStreamHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.audio_streams = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def get(self, stream_id):
+        """Look up a registered stream."""
+        with self._lock:
+            return self.streams.get(stream_id)
+
+    def create_stream(self, content_type="audio/mpeg"):
+        """Register a new stream, evicting the oldest ones beyond the limit."""
+        stream = AudioStream(content_type)
+        with self._lock:
+            self.streams[stream.stream_id] = stream
+            while len(self.streams) > self.max_streams:
+                self.streams.popitem(last=False)
+        return stream
+
+    def url_for(self, stream):
+        """Return the browser-facing URL of a stream."""
+        return f"{self.public_url}/tts/{stream.stream_id}"
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_audio_stream_server():
+    """Return the process-wide stream server, starting it on first use. Returns None if it cannot bind."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = AudioStreamServer()
+            except OSError:
+                return None
+        return _server
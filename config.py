@@ -4,6 +4,7 @@ Contains all constants, settings, and system prompts.
 """
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables (only for local development)
@@ -19,15 +20,81 @@ CHANNELS = 1
 CHUNK_SIZE = 1024
 MAX_RECORDING_SECONDS = 30
 
+# Hands-free conversation: energy-based voice activity detection and barge-in
+VAD_RMS_THRESHOLD = 0.02
+BARGE_IN_RMS_THRESHOLD = 0.06  # Higher while the reply is playing so speaker echo is not mistaken for speech
+VAD_MIN_SPEECH_SECONDS = 0.2
+VAD_END_SILENCE_SECONDS = 0.8
+VAD_PREROLL_SECONDS = 0.3
+SPEECH_WORDS_PER_SECOND = 2.5  # Used to estimate how long a reply keeps playing
+PLAYBACK_MARGIN_SECONDS = 2.0  # Browser playback starts later than the server estimate; speech starting here may be echo
+ECHO_OVERLAP_THRESHOLD = 0.8  # Share of a possible echo's words found in the reply for it to be ignored
+
 # Model configuration
 GROQ_MODEL_TEXT = "llama-3.3-70b-versatile"
 GROQ_MODEL_STT = "whisper-large-v3"
+STT_LANGUAGE = "en"
+
+# LLM routing configuration: cheap questions go to the fast model, the rest to the large one
+LLM_ROUTING_ENABLED = True
+LLM_ROUTES = {
+    "fast": {"model": "llama-3.1-8b-instant", "max_tokens": 200, "temperature": 0.7},
+    "large": {"model": GROQ_MODEL_TEXT, "max_tokens": 300, "temperature": 0.7},
+}
+LLM_FAST_MAX_WORDS = 12
+LLM_FAST_MAX_HISTORY = 6
+LLM_FAST_PATTERNS = (
+    r"^(hi|hello|hey|good (morning|afternoon|evening))\b",
+    r"\b(thanks|thank you|bye|goodbye|see you)\b",
+    r"\b(who are you|what('s| is) your name|where (do|did) you (work|study))\b",
+)
+LLM_LARGE_PATTERNS = (
+    r"\b(life story|superpower|grow(th)?|misconception|push(ing)? (your|the) limits)\b",
+    r"\b(why|explain|compare|describe|walk me through|how (do|did|would) you)\b",
+)
+LLM_ESCALATION_ENABLED = True
+LLM_MIN_ANSWER_CHARS = 40
+LLM_ESCALATION_PHRASES = (
+    "as an ai",
+    "i'm not sure",
+    "i am not sure",
+    "i don't have",
+    "i do not have",
+    "language model",
+)
 GROQ_MODEL_TTS = "playai-tts"
 GROQ_TTS_VOICE = "Mitch-PlayAI"
 
+# Segmented transcription for long audio: split at silences into overlapping windows
+STT_SEGMENTED_MIN_SECONDS = 60
+STT_SEGMENT_SECONDS = 30
+STT_SEGMENT_OVERLAP_SECONDS = 1.5
+STT_SEGMENT_SEARCH_SECONDS = 5
+STT_SEGMENT_MAX_WORKERS = 4
+
+# Transcript cache configuration
+TRANSCRIPT_CACHE_ENABLED = True
+TRANSCRIPT_CACHE_MEMORY_ENTRIES = 128
+TRANSCRIPT_CACHE_DISK_ENTRIES = 2048
+TRANSCRIPT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "voicebot_transcripts")
+
 # Deepgram TTS configuration (fallback)
 DEEPGRAM_TTS_MODEL = "aura-2-odysseus-en"
 
+# Streaming TTS configuration
+# Audio is served from a second port; the browser must be able to reach TTS_STREAM_PUBLIC_URL,
+# so streaming stays off unless that URL is set explicitly
+TTS_STREAM_PUBLIC_URL = os.getenv("TTS_STREAM_PUBLIC_URL")
+TTS_STREAMING_ENABLED = bool(TTS_STREAM_PUBLIC_URL)
+TTS_STREAM_CHUNK_SIZE = 4096
+TTS_STREAM_HOST = "0.0.0.0"
+TTS_STREAM_PORT = int(os.getenv("TTS_STREAM_PORT", "8502"))
+TTS_STREAM_MAX_STREAMS = 32
+TTS_STREAM_FIRST_CHUNK_TIMEOUT = 10
+
+# Metrics configuration
+METRICS_MAX_SAMPLES = 500
+
 # Nitin's persona system prompt
 SYSTEM_PROMPT = """
 
@@ -126,6 +193,36 @@ No matter the question, prefer to end with this line wherever possible especiall
 
 """
 
+# Persona retrieval configuration: send the core prompt plus only the most relevant sections
+PERSONA_RETRIEVAL_ENABLED = True
+PERSONA_TOP_K = 3
+PERSONA_CORE_SECTIONS = ("Tone and Style", "Answer Closing Rule")
+
+# Prefetch configuration: answer likely follow-ups while the user listens to the reply
+PREFETCH_ENABLED = True
+PREFETCH_MAX_QUESTIONS = 2
+# Words a question may add to a topic's name and still be answered by the prefetched overview
+PREFETCH_OVERVIEW_WORDS = frozenset("""
+work works worked working role roles job experience experiences internship internships
+project projects overview summary summarize explain describe detail details elaborate
+involved like time there
+""".split())
+PREFETCH_TOPIC_SECTIONS = ("Core Identity & Experience", "Signature Projects")
+
+# Memory governor configuration: per-session limits on conversation history and audio references
+MEMORY_GOVERNOR_ENABLED = True
+MEMORY_SOFT_LIMIT_MB = 8
+MEMORY_HARD_LIMIT_MB = 32
+MEMORY_MAX_TRACKED_SESSIONS = 256
+MEMORY_OFFLOAD_DIR = os.path.join(tempfile.gettempdir(), "voicebot_conversations")
+
+# Profiling configuration: capture a whole rerun on demand (?profile=1, sidebar toggle or sampling)
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_SAMPLE_EVERY_N_RERUNS = 0  # 0 disables sampling
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "voicebot_profiles")
+PROFILE_MAX_FILES = 20
+PROFILE_TOP_N = 15
+
 # Streamlit page configuration
 PAGE_CONFIG = {
     "page_title": "Nitin's AI Chatbot",
@@ -1,20 +1,44 @@
 """
 Language Model service for the VoiceBot application.
-Handles text generation using Groq's LLM API.
+Handles text generation using Groq's LLM API, routing each turn to a fast or large model.
 """
 
+import re
+import time
 import streamlit as st
 from groq import Groq
-from config import GROQ_MODEL_TEXT, SYSTEM_PROMPT
+from metrics import metrics
+from persona_index import get_persona_index
+from config import (
+    GROQ_MODEL_TEXT,
+    SYSTEM_PROMPT,
+    LLM_ROUTING_ENABLED,
+    LLM_ROUTES,
+    LLM_FAST_MAX_WORDS,
+    LLM_FAST_MAX_HISTORY,
+    LLM_FAST_PATTERNS,
+    LLM_LARGE_PATTERNS,
+    LLM_ESCALATION_ENABLED,
+    LLM_MIN_ANSWER_CHARS,
+    LLM_ESCALATION_PHRASES,
+    PERSONA_RETRIEVAL_ENABLED,
+    PERSONA_TOP_K,
+)
 
 
 class LLMService:
     """Handles text generation using Groq's language models."""
-    
-    def __init__(self, groq_client):
+
+    def __init__(self, groq_client, routes=None):
         self.groq_client = groq_client
         self.model = GROQ_MODEL_TEXT
         self.system_prompt = SYSTEM_PROMPT
+        self.routes = routes or LLM_ROUTES
+        self.routing_enabled = LLM_ROUTING_ENABLED
+        self.fast_patterns = [re.compile(p, re.IGNORECASE) for p in LLM_FAST_PATTERNS]
+        self.large_patterns = [re.compile(p, re.IGNORECASE) for p in LLM_LARGE_PATTERNS]
+        self.persona_index = get_persona_index() if PERSONA_RETRIEVAL_ENABLED else None
+        self.prompt_mode = "retrieved" if self.persona_index else "full"
 
     def clean_message_for_api(self, message):
         """Remove UI-specific fields from message for API calls."""
@@ -23,28 +47,166 @@ class LLMService:
             "content": message["content"]
         }
 
+    def build_system_prompt(self, user_message, conversation_history, metric_prefix="llm"):
+        """Return (prompt_mode, system_prompt) for a turn.
+
+        In "retrieved" mode the prompt is the persona core plus the sections most relevant
+        to this and the previous user message; it falls back to the full prompt when
+        nothing in the persona matches.
+        """
+        if self.prompt_mode != "retrieved" or self.persona_index is None:
+            return "full", self.system_prompt
+
+        previous = [turn["content"] for turn in conversation_history if turn["role"] == "user"][-1:]
+        query = " ".join(previous + [user_message])
+        prompt = self.persona_index.build_prompt(query, PERSONA_TOP_K)
+        if prompt is None:
+            metrics.increment(f"{metric_prefix}.prompt.fallback")
+            return "full", self.system_prompt
+        return "retrieved", prompt
+
+    def classify_request(self, user_message, conversation_history):
+        """Pick "fast" or "large" for a turn using cheap local heuristics."""
+        if not self.routing_enabled or "fast" not in self.routes:
+            return "large"
+
+        text = user_message.strip()
+        if any(p.search(text) for p in self.large_patterns):
+            return "large"
+        if self.is_fast_intent(text):
+            return "fast"
+        if len(text.split()) > LLM_FAST_MAX_WORDS:
+            return "large"
+        if len(conversation_history) > LLM_FAST_MAX_HISTORY:
+            return "large"
+        return "fast"
+
+    def is_fast_intent(self, user_message):
+        """True for greetings, thanks and simple identity questions (LLM_FAST_PATTERNS)."""
+        text = user_message.strip()
+        return (
+            not any(p.search(text) for p in self.large_patterns)
+            and any(p.search(text) for p in self.fast_patterns)
+        )
+
+    def passes_quality_check(self, answer, finish_reason, fast_intent=False):
+        """Return False if a fast-model answer looks truncated, empty or evasive.
+
+        Short answers are expected for fast intents, so only emptiness counts against them.
+        """
+        min_chars = 1 if fast_intent else LLM_MIN_ANSWER_CHARS
+        if not answer or len(answer.strip()) < min_chars:
+            return False
+        if finish_reason == "length":
+            return False
+        lowered = answer.lower()
+        return not any(phrase in lowered for phrase in LLM_ESCALATION_PHRASES)
+
+    def _complete(self, route, messages, prompt_mode, metric_prefix):
+        """Run one chat completion on a route and record its latency by route and prompt mode."""
+        settings = self.routes[route]
+        start = time.perf_counter()
+        response = self.groq_client.chat.completions.create(
+            model=settings["model"],
+            messages=messages,
+            max_tokens=settings["max_tokens"],
+            temperature=settings["temperature"]
+        )
+        elapsed = time.perf_counter() - start
+        metrics.record_timing(f"{metric_prefix}.route.{route}", elapsed)
+        metrics.record_timing(f"{metric_prefix}.prompt.{prompt_mode}.{route}", elapsed)
+        metrics.increment(f"{metric_prefix}.route.{route}")
+        choice = response.choices[0]
+        content = choice.message.content
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        if prompt_tokens is None:
+            # Rough estimate when the provider does not report usage
+            prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+        if total_tokens is None:
+            total_tokens = prompt_tokens + len(content or "") // 4
+        return content, getattr(choice, "finish_reason", None), prompt_tokens, total_tokens
+
+    def routing_stats(self):
+        """Return per-route latency percentiles and the fast-route escalation rate."""
+        counters = metrics.snapshot()["counters"]
+        fast_calls = counters.get("llm.route.fast", 0)
+        return {
+            "routes": {
+                route: {
+                    "calls": counters.get(f"llm.route.{route}", 0),
+                    **metrics.percentiles(f"llm.route.{route}", (50, 95)),
+                }
+                for route in self.routes
+            },
+            "escalation_rate": counters.get("llm.escalations", 0) / fast_calls if fast_calls else 0.0,
+        }
+
+    def prompt_stats(self):
+        """Return mean prompt tokens and per-route completion latency for full vs retrieved prompts.
+
+        Latency is split by route so the comparison is not skewed by which model answered.
+        """
+        samples = metrics.snapshot()["timings"]
+        stats = {}
+        for mode in ("full", "retrieved"):
+            tokens = samples.get(f"llm.prompt_tokens.{mode}", [])
+            if tokens:
+                stats[mode] = {
+                    "turns": len(tokens),
+                    "mean_prompt_tokens": sum(tokens) / len(tokens),
+                    "routes": {
+                        route: metrics.percentiles(f"llm.prompt.{mode}.{route}", (50, 95))
+                        for route in self.routes
+                        if f"llm.prompt.{mode}.{route}" in samples
+                    },
+                }
+        return stats
+
+    def generate_response_with_usage(self, user_message, conversation_history, metric_prefix="llm"):
+        """Generate a response and return (answer, total_tokens). Errors are raised to the caller.
+
+        Background callers pass their own metric_prefix so their calls stay out of the
+        routing and prompt statistics of user-facing turns.
+        """
+        # Build messages with conversation history
+        prompt_mode, system_prompt = self.build_system_prompt(user_message, conversation_history, metric_prefix)
+        messages = [{"role": "system", "content": system_prompt}]
+
+        # Add conversation history (filter out input_method field)
+        for turn in conversation_history:
+            messages.append(self.clean_message_for_api(turn))
+
+        # Add current user message
+        messages.append({"role": "user", "content": user_message})
+
+        route = self.classify_request(user_message, conversation_history)
+        if route != "fast":
+            answer, _, prompt_tokens, total_tokens = self._complete(route, messages, prompt_mode, metric_prefix)
+        else:
+            try:
+                answer, finish_reason, prompt_tokens, total_tokens = self._complete("fast", messages, prompt_mode, metric_prefix)
+            except Exception:
+                if not LLM_ESCALATION_ENABLED:
+                    raise
+                answer, finish_reason, prompt_tokens, total_tokens = None, None, None, 0
+
+            fast_intent = self.is_fast_intent(user_message)
+            if LLM_ESCALATION_ENABLED and not self.passes_quality_check(answer, finish_reason, fast_intent):
+                # Fast answer was unusable; pay for the large model instead
+                metrics.increment(f"{metric_prefix}.escalations")
+                wasted_tokens = total_tokens
+                answer, _, prompt_tokens, total_tokens = self._complete("large", messages, prompt_mode, metric_prefix)
+                total_tokens += wasted_tokens
+
+        metrics.observe(f"{metric_prefix}.prompt_tokens.{prompt_mode}", prompt_tokens)
+        return answer, total_tokens
+
     def generate_response(self, user_message, conversation_history):
         """Generate response using Groq language model."""
         try:
-            # Build messages with conversation history
-            messages = [{"role": "system", "content": self.system_prompt}]
-            
-            # Add conversation history (filter out input_method field)
-            for turn in conversation_history:
-                messages.append(self.clean_message_for_api(turn))
-            
-            # Add current user message
-            messages.append({"role": "user", "content": user_message})
-            
-            # Generate response using Groq
-            response = self.groq_client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=300,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content
+            return self.generate_response_with_usage(user_message, conversation_history)[0]
         except Exception as e:
             st.error(f"Error generating response with Groq: {str(e)}")
             return None
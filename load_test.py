@@ -0,0 +1,268 @@
+"""
+Multi-session load test for the VoiceBot application.
+Drives app.py headlessly with Streamlit's AppTest against stubbed Groq/Deepgram
+clients and fixture audio, ramping the number of concurrent sessions.
+
+Usage:
+    python load_test.py --levels 1,2,4,8 --turns 5 --latency 0.2
+"""
+
+import argparse
+import functools
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+import soundfile as sf
+
+try:
+    import sounddevice  # noqa: F401
+except OSError:
+    # Headless load-test hosts usually lack PortAudio; the microphone is replaced below anyway
+    sys.modules["sounddevice"] = types.ModuleType("sounddevice")
+
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.secrets import Secrets
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.testing.v1 import AppTest
+from config import SAMPLE_RATE
+from memory_governor import current_rss_bytes
+from metrics import Metrics
+import audio_recorder
+import tts_service
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+FAKE_MP3 = b"\xff\xfb\x90\x64" + b"\x00" * 4096
+
+
+class FakeGroq:
+    """Stand-in for the Groq client that answers instantly (plus optional simulated latency)."""
+
+    def __init__(self, api_key=None, latency=0.0):
+        self.latency = latency
+        speech = SimpleNamespace(
+            create=self._speech,
+            with_streaming_response=SimpleNamespace(create=self._speech_stream),
+        )
+        self.audio = SimpleNamespace(
+            transcriptions=SimpleNamespace(create=self._transcribe),
+            speech=speech,
+        )
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _transcribe(self, **kwargs):
+        self._wait()
+        return SimpleNamespace(text="Tell me about HackOps Recon.", segments=[])
+
+    def _chat(self, **kwargs):
+        self._wait()
+        message = SimpleNamespace(content="HackOps Recon is my LangGraph cybersecurity agent.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def _speech(self, **kwargs):
+        self._wait()
+        return SimpleNamespace(read=lambda: FAKE_MP3)
+
+    def _speech_stream(self, **kwargs):
+        latency = self.latency
+
+        class _Streamed:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def iter_bytes(self, chunk_size):
+                if latency:
+                    time.sleep(latency)
+                for start in range(0, len(FAKE_MP3), chunk_size):
+                    yield FAKE_MP3[start:start + chunk_size]
+
+        return _Streamed()
+
+
+class FakeDeepgram:
+    """Stand-in for the Deepgram client used as TTS fallback."""
+
+    def __init__(self, api_key=None):
+        self.speak = SimpleNamespace(v=lambda version: SimpleNamespace(save=self._save))
+
+    def _save(self, filename, text_data, options):
+        with open(filename, "wb") as audio_file:
+            audio_file.write(FAKE_MP3)
+
+
+def shared_runtime():
+    """Runtime stand-in used while a concurrent AppTest run has already reset the global one.
+
+    AppTest installs a mock Runtime per run and clears it when the run ends, which breaks
+    other sessions still running in parallel threads. Secrets are global for the same
+    reason, so they are installed once for the whole load test instead of per AppTest.
+    """
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    return runtime
+
+
+def stub_secrets():
+    """Secrets with placeholder API keys so both providers are configured."""
+    secrets = Secrets()
+    secrets._secrets = {"GROQ_API_KEY": "load-test", "DEEPGRAM_API_KEY": "load-test"}
+    return secrets
+
+
+def load_fixture_audio(path, seconds):
+    """Load fixture audio from a file, or synthesize a voice-like tone if no file is given."""
+    if path:
+        audio_data, _ = sf.read(path, dtype="float32", always_2d=True)
+        return audio_data[:, :1]
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    return tone.astype(np.float32).reshape(-1, 1)
+
+
+def temp_audio_usage():
+    """Return (count, bytes) of temporary MP3 clips in the system temp directory."""
+    count, size = 0, 0
+    with os.scandir(tempfile.gettempdir()) as entries:
+        for entry in entries:
+            if entry.name.endswith(".mp3") and entry.is_file():
+                count += 1
+                size += entry.stat().st_size
+    return count, size
+
+
+class SessionDriver:
+    """One simulated browser tab cycling through record/stop/new-chat/load-conversation."""
+
+    def __init__(self, level_metrics, timeout, seed):
+        self.metrics = level_metrics
+        self.rng = random.Random(seed)
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    def _rerun(self, action, element=None):
+        start = time.perf_counter()
+        if element is None:
+            self.app.run()
+        else:
+            element.click().run()
+        self.metrics.record_timing("rerun", time.perf_counter() - start)
+        self.metrics.record_timing(f"rerun.{action}", time.perf_counter() - start)
+        if self.app.exception:
+            self.metrics.increment("errors")
+
+    def run(self, turns, new_chat_every, load_probability):
+        self._rerun("initial")
+        for turn in range(turns):
+            self._rerun("record", self.app.button(key="start_voice_recording"))
+            self._rerun("stop", self.app.button(key="stop_recording_visual"))
+            self.metrics.increment("turns")
+
+            if new_chat_every and (turn + 1) % new_chat_every == 0:
+                self._rerun("new_chat", self.app.button(key="new_chat_button"))
+
+            conversations = self.app.session_state["conversations"]
+            if conversations and self.rng.random() < load_probability:
+                conv = self.rng.choice(conversations)
+                self._rerun("load", self.app.button(key=f"load_{conv['id']}"))
+        return self.app
+
+
+def run_level(sessions, args):
+    """Run one concurrency level and return its summary."""
+    level_metrics = Metrics(max_samples=1_000_000)
+    temp_before = temp_audio_usage()
+    rss_before = current_rss_bytes()
+
+    drivers = [SessionDriver(level_metrics, args.timeout, args.seed + i) for i in range(sessions)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(d.run, args.turns, args.new_chat_every, args.load_probability) for d in drivers]
+        apps = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+
+    rss_after = current_rss_bytes()
+    temp_after = temp_audio_usage()
+    snapshot = level_metrics.snapshot()
+    summary = {
+        "sessions": sessions,
+        "turns": snapshot["counters"].get("turns", 0),
+        "errors": snapshot["counters"].get("errors", 0),
+        "turns_per_second": snapshot["counters"].get("turns", 0) / elapsed,
+        "rerun": level_metrics.percentiles("rerun"),
+        "per_action": {
+            name.split(".", 1)[1]: level_metrics.percentiles(name)
+            for name in snapshot["timings"] if name.startswith("rerun.")
+        },
+        "memory_per_session_mb": (rss_after - rss_before) / sessions / 2**20,
+        "temp_files_added": temp_after[0] - temp_before[0],
+        "temp_mb_added": (temp_after[1] - temp_before[1]) / 2**20,
+    }
+    del apps, drivers
+    return summary
+
+
+def print_summary(summary):
+    """Print one level's results."""
+    rerun = summary["rerun"]
+    print(
+        f"{summary['sessions']:>8} {summary['turns']:>6} {summary['turns_per_second']:>9.2f} "
+        f"{rerun.get('p50', 0) * 1000:>8.0f} {rerun.get('p95', 0) * 1000:>8.0f} {rerun.get('p99', 0) * 1000:>8.0f} "
+        f"{summary['memory_per_session_mb']:>10.2f} {summary['temp_files_added']:>6} "
+        f"{summary['temp_mb_added']:>8.2f} {summary['errors']:>6}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent VoiceBot sessions and report rerun latency.")
+    parser.add_argument("--levels", default="1,2,4,8", help="Comma-separated concurrency levels to ramp through")
+    parser.add_argument("--turns", type=int, default=5, help="Voice turns per session")
+    parser.add_argument("--new-chat-every", type=int, default=3, help="Start a new chat every N turns (0 disables)")
+    parser.add_argument("--load-probability", type=float, default=0.3, help="Chance of loading an old conversation after a turn")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated latency in seconds for each stubbed API call")
+    parser.add_argument("--audio", help="Fixture WAV/FLAC file to use as the recorded utterance")
+    parser.add_argument("--audio-seconds", type=float, default=3.0, help="Length of the synthesized fixture when --audio is not given")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Also print per-action latency percentiles")
+    args = parser.parse_args()
+
+    fixture = load_fixture_audio(args.audio, args.audio_seconds)
+    noise = np.random.default_rng(args.seed)
+
+    def record_fixture(recorder):
+        # Add inaudible noise so each turn fingerprints differently and misses the transcript cache
+        return fixture + noise.normal(0, 1e-3, fixture.shape).astype(np.float32)
+    levels = [int(level) for level in args.levels.split(",") if level]
+
+    with mock.patch("groq.Groq", functools.partial(FakeGroq, latency=args.latency)), \
+            mock.patch.object(tts_service, "DeepgramClient", FakeDeepgram), \
+            mock.patch.object(audio_recorder.AudioRecorder, "start_recording", lambda self: None), \
+            mock.patch.object(audio_recorder.AudioRecorder, "stop_recording", record_fixture), \
+            mock.patch.object(st, "secrets", stub_secrets()), \
+            mock.patch.object(Runtime, "instance", classmethod(lambda cls, _rt=shared_runtime(): cls._instance or _rt)):
+        print(f"{'sessions':>8} {'turns':>6} {'turns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'MB/sess':>10} {'tmp+':>6} {'tmp MB+':>8} {'errors':>6}")
+        for sessions in levels:
+            summary = run_level(sessions, args)
+            print_summary(summary)
+            if args.verbose:
+                for action, pcts in sorted(summary["per_action"].items()):
+                    print(f"{'':>8} {action:<10} " + " ".join(f"{k}={v * 1000:.0f}ms" for k, v in pcts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Per-session memory governor for the VoiceBot application.
+Estimates how much memory each Streamlit session holds and keeps it under
+configurable soft and hard limits by offloading or dropping the oldest data.
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from metrics import metrics
+try:
+    import resource
+except ImportError:
+    resource = None  # Unix-only; RSS is not reported on Windows
+
+from config import (
+    MEMORY_SOFT_LIMIT_MB,
+    MEMORY_HARD_LIMIT_MB,
+    MEMORY_OFFLOAD_DIR,
+    MEMORY_MAX_TRACKED_SESSIONS,
+)
+
+_session_footprints = OrderedDict()
+_footprints_lock = threading.Lock()
+
+
+def current_rss_bytes():
+    """Return the current resident set size of this process, or 0 where it is unavailable."""
+    if resource is None:
+        return 0
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # macOS reports ru_maxrss in bytes, Linux in kilobytes; this is a peak, not current
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def deep_size(obj, seen=None):
+    """Approximate bytes held by plain containers, strings, bytes and NumPy arrays."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def _forget_ended_sessions():
+    """Drop footprints and offload files of sessions the Streamlit runtime no longer has.
+
+    Call with the lock held.
+    """
+    if not Runtime.exists():
+        return
+    runtime = Runtime.instance()
+    for session_id in list(_session_footprints):
+        if not runtime.is_active_session(session_id):
+            del _session_footprints[session_id]
+
+    # Offloaded transcripts must not outlive their session, including sessions whose
+    # footprint was already evicted by MEMORY_MAX_TRACKED_SESSIONS
+    if not os.path.isdir(MEMORY_OFFLOAD_DIR):
+        return
+    for name in os.listdir(MEMORY_OFFLOAD_DIR):
+        session_id, _, _ = name.rpartition("_")
+        if name.endswith(".json") and session_id and not runtime.is_active_session(session_id):
+            try:
+                os.unlink(os.path.join(MEMORY_OFFLOAD_DIR, name))
+                metrics.increment("memory.offload_files_removed")
+            except OSError:
+                pass  # Another session's sweep removed it first
+
+
+def session_gauges():
+    """Return {session_id: bytes} for recently measured, still active sessions."""
+    with _footprints_lock:
+        _forget_ended_sessions()
+        return dict(_session_footprints)
+
+
+class MemoryGovernor:
+    """Measures and limits the footprint of the current session's state."""
+
+    def __init__(self, soft_limit_mb=MEMORY_SOFT_LIMIT_MB, hard_limit_mb=MEMORY_HARD_LIMIT_MB,
+                 offload_dir=MEMORY_OFFLOAD_DIR):
+        self.soft_limit = soft_limit_mb * 2**20
+        self.hard_limit = hard_limit_mb * 2**20
+        self.offload_dir = offload_dir
+        ctx = get_script_run_ctx()
+        self.session_id = ctx.session_id if ctx else "default"
+
+    def footprint(self):
+        """Return an approximate per-category byte breakdown of this session."""
+        state = st.session_state
+        recorder = state.get("audio_recorder")
+        audio_bytes = sum(
+            os.path.getsize(path) for path in state.get("audio_files", {}).values() if os.path.exists(path)
+        )
+        breakdown = {
+            "conversations": deep_size(state.get("conversations", [])),
+            "current_conversation": deep_size(state.get("current_conversation", [])),
+            # Every referenced clip is read into memory and pushed through st.audio on each rerun
+            "audio": audio_bytes,
+            "recorder": deep_size(list(recorder.audio_queue.queue)) if recorder is not None else 0,
+        }
+        breakdown["total"] = sum(breakdown.values())
+        return breakdown
+
+    def enforce(self):
+        """Measure the session, compact it if it is over its limits, and publish gauges."""
+        total = self.footprint()["total"]
+        if total > self.soft_limit:
+            metrics.increment("memory.soft_limit_exceeded")
+            total = self._offload_conversations(total)
+            total = self._drop_audio_references(total, keep=1)
+        if total > self.hard_limit:
+            metrics.increment("memory.hard_limit_exceeded")
+            total = self._drop_audio_references(total, keep=0)
+            total = self._drop_conversations(total)
+
+        with _footprints_lock:
+            _forget_ended_sessions()
+            _session_footprints[self.session_id] = total
+            _session_footprints.move_to_end(self.session_id)
+            while len(_session_footprints) > MEMORY_MAX_TRACKED_SESSIONS:
+                _session_footprints.popitem(last=False)
+            largest = max(_session_footprints.values())
+            tracked = sum(_session_footprints.values())
+        metrics.set_gauge("memory.session_bytes", total)
+        metrics.set_gauge("memory.session_bytes.max", largest)
+        metrics.set_gauge("memory.sessions_bytes", tracked)
+        metrics.set_gauge("memory.process_rss_bytes", current_rss_bytes())
+        return total
+
+    def _offload_path(self, conversation_id):
+        return os.path.join(self.offload_dir, f"{self.session_id}_{conversation_id}.json")
+
+    def _offload_conversations(self, total):
+        """Move the oldest saved conversations' messages to disk until under the soft limit."""
+        os.makedirs(self.offload_dir, exist_ok=True)
+        for conv in reversed(st.session_state.conversations):
+            if total <= self.soft_limit:
+                break
+            if conv.get("offloaded"):
+                continue
+            path = self._offload_path(conv["id"])
+            with open(path, "w", encoding="utf-8") as offload_file:
+                json.dump(conv["messages"], offload_file)
+            total -= deep_size(conv["messages"])
+            conv["messages"] = None
+            conv["offloaded"] = path
+            metrics.increment("memory.conversations_offloaded")
+        return total
+
+    def _drop_audio_references(self, total, keep):
+        """Delete the oldest referenced clips, keeping the newest `keep`, until under the soft limit."""
+        audio_files = st.session_state.audio_files
+        keys = sorted(audio_files, key=lambda key: int(key.split("_")[1]))
+        for key in keys[:max(0, len(keys) - keep)]:
+            if total <= self.soft_limit:
+                break
+            path = audio_files.pop(key)
+            if os.path.exists(path):
+                total -= os.path.getsize(path)
+                os.unlink(path)
+            metrics.increment("memory.audio_references_dropped")
+        return total
+
+    def _drop_conversations(self, total):
+        """Forget the oldest saved conversations entirely until under the hard limit."""
+        conversations = st.session_state.conversations
+        while conversations and total > self.hard_limit:
+            conv = conversations.pop()
+            total -= deep_size(conv)
+            self.discard_offloaded(conv)
+            metrics.increment("memory.conversations_dropped")
+        return total
+
+    def load_messages(self, conv):
+        """Return a saved conversation's messages, reading them back from disk if offloaded."""
+        if conv.get("offloaded"):
+            with open(conv["offloaded"], "r", encoding="utf-8") as offload_file:
+                return json.load(offload_file)
+        return conv["messages"]
+
+    @staticmethod
+    def discard_offloaded(conv):
+        """Remove a conversation's offload file, if it has one."""
+        path = conv.get("offloaded")
+        if path and os.path.exists(path):
+            os.unlink(path)
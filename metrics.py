@@ -0,0 +1,92 @@
+"""
+Lightweight metrics for the VoiceBot application.
+Keeps process-wide counters, gauges and timing samples, and logs every update.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import numpy as np
+from config import METRICS_MAX_SAMPLES
+
+logger = logging.getLogger("voicebot.metrics")
+
+
+class Metrics:
+    """Thread-safe store for counters, gauges and timing/value samples."""
+
+    def __init__(self, max_samples=METRICS_MAX_SAMPLES):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        self.timings = defaultdict(lambda: deque(maxlen=max_samples))
+
+    def increment(self, name, amount=1):
+        """Increase a counter by the given amount."""
+        with self._lock:
+            self.counters[name] += amount
+        logger.debug("%s += %s", name, amount)
+
+    def set_gauge(self, name, value):
+        """Set a gauge to its latest value."""
+        with self._lock:
+            self.gauges[name] = value
+        logger.debug("%s = %s", name, value)
+
+    def record_timing(self, name, seconds):
+        """Record a timing sample in seconds."""
+        with self._lock:
+            self.timings[name].append(seconds)
+        logger.info("%s took %.1f ms", name, seconds * 1000)
+
+    def observe(self, name, value):
+        """Record a non-timing sample (e.g. a token count)."""
+        with self._lock:
+            self.timings[name].append(value)
+        logger.debug("%s observed %s", name, value)
+
+    @contextmanager
+    def timer(self, name):
+        """Time the enclosed block and record it under the given name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_timing(name, time.perf_counter() - start)
+
+    def percentiles(self, name, percentiles=(50, 95, 99)):
+        """Return the requested percentiles for a timing (in seconds) or observed value."""
+        with self._lock:
+            samples = list(self.timings.get(name, ()))
+        if not samples:
+            return {}
+        values = np.percentile(samples, percentiles)
+        return {f"p{p}": float(v) for p, v in zip(percentiles, values)}
+
+    def last(self, name):
+        """Return the most recent sample for a timing, or None."""
+        with self._lock:
+            samples = self.timings.get(name)
+            return samples[-1] if samples else None
+
+    def snapshot(self):
+        """Return a copy of all counters, gauges and timing samples."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "timings": {name: list(samples) for name, samples in self.timings.items()},
+            }
+
+    def reset(self):
+        """Clear all recorded metrics."""
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.timings.clear()
+
+
+# Shared process-wide metrics instance
+metrics = Metrics()
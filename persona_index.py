@@ -0,0 +1,114 @@
+"""
+Persona retrieval for the VoiceBot application.
+Splits the system prompt into sections and retrieves only the ones relevant to a turn,
+using a TF-IDF similarity index held in NumPy.
+"""
+
+import re
+import threading
+import numpy as np
+from config import SYSTEM_PROMPT, PERSONA_CORE_SECTIONS
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be but by do does did for from had has have how i in is it its
+me my of on or so that the this to was we what when where which who why with you your
+tell about more can could would should please
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def split_persona(prompt):
+    """Split a markdown persona prompt into (core_prompt, sections).
+
+    The preamble and the headings listed in PERSONA_CORE_SECTIONS form the core prompt
+    that is always sent. Every other heading is split into one section per top-level
+    bullet, each prefixed with its heading so it still reads on its own.
+    """
+    core_parts = []
+    sections = []
+    blocks = re.split(r"^## ", prompt, flags=re.MULTILINE)
+    core_parts.append(blocks[0].replace("---", "").strip())
+
+    for block in blocks[1:]:
+        heading, _, body = block.partition("\n")
+        body = body.replace("---", "").strip()
+        title = re.sub(r"[^\w\s&/–-]", "", heading).strip()
+        if any(name.lower() in title.lower() for name in PERSONA_CORE_SECTIONS):
+            core_parts.append(f"## {heading.strip()}\n{body}")
+            continue
+
+        bullets = re.split(r"\n(?=- )", body)
+        intro = "" if bullets[0].startswith("- ") else bullets.pop(0).strip()
+        for bullet in bullets:
+            text = f"## {heading.strip()}\n{intro + chr(10) if intro else ''}{bullet.strip()}"
+            sections.append({"title": title, "text": text})
+
+    return "\n\n".join(core_parts), sections
+
+
+class PersonaIndex:
+    """TF-IDF similarity index over persona sections."""
+
+    def __init__(self, prompt=SYSTEM_PROMPT):
+        self.full_prompt = prompt
+        self.core_prompt, self.sections = split_persona(prompt)
+
+        documents = [tokenize(s["text"]) for s in self.sections]
+        self.vocabulary = {t: i for i, t in enumerate(sorted({t for doc in documents for t in doc}))}
+        counts = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, doc in enumerate(documents):
+            for token in doc:
+                counts[row, self.vocabulary[token]] += 1
+
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)).astype(np.float32) + 1
+        self.matrix = self._normalize(counts * self.idf)
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    def _vectorize(self, text):
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for token in tokenize(text):
+            index = self.vocabulary.get(token)
+            if index is not None:
+                vector[index] += 1
+        return self._normalize(vector * self.idf)
+
+    def search(self, query, top_k):
+        """Return [(score, section)] for the top_k sections with a non-zero score."""
+        if not self.sections:
+            return []
+        scores = self.matrix @ self._vectorize(query)
+        best = np.argsort(-scores)[:top_k]
+        return [(float(scores[i]), self.sections[i]) for i in best if scores[i] > 0]
+
+    def build_prompt(self, query, top_k):
+        """Return the core prompt plus the top_k relevant sections, or None if nothing matched."""
+        hits = self.search(query, top_k)
+        if not hits:
+            return None
+        # Keep the original prompt order so related bullets read naturally
+        order = {id(s): i for i, s in enumerate(self.sections)}
+        selected = sorted((s for _, s in hits), key=lambda s: order[id(s)])
+        return "\n\n".join([self.core_prompt] + [s["text"] for s in selected])
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_persona_index():
+    """Return the process-wide persona index, building it on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PersonaIndex()
+        return _index
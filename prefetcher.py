@@ -0,0 +1,223 @@
+"""
+Idle-time prefetching for the VoiceBot application.
+Predicts likely follow-up questions after each reply and prepares their answers
+and speech in the background so a matching question can be served immediately.
+"""
+
+import os
+import re
+import threading
+from metrics import metrics
+from persona_index import get_persona_index, tokenize
+from config import (
+    PREFETCH_MAX_QUESTIONS,
+    PREFETCH_OVERVIEW_WORDS,
+    PREFETCH_TOPIC_SECTIONS,
+)
+
+TOPIC_PATTERN = re.compile(r"^- \*\*(.+?)\*\*", re.MULTILINE)
+PARENTHETICAL_PATTERN = re.compile(r"\(([^)]*)\)")
+
+
+def conversation_key(conversation):
+    """Identify a conversation state so answers are only reused in the context they were made for."""
+    return len(conversation), conversation[-1]["content"] if conversation else ""
+
+
+def topic_aliases(name):
+    """Return the token sets that identify a topic name.
+
+    "Hewlett Packard Enterprise (HPE)" -> {hewlett, packard, enterprise} and {hpe};
+    "IndianTaxGPT / IncomeTaxGPT" -> {indiantaxgpt} and {incometaxgpt}. Multi-word
+    parentheticals such as "(AI Developer)" describe the topic rather than name it.
+    """
+    aliases = [
+        frozenset(tokenize(inner))
+        for inner in PARENTHETICAL_PATTERN.findall(name)
+        if len(tokenize(inner)) == 1
+    ]
+    for part in PARENTHETICAL_PATTERN.sub(" ", name).split("/"):
+        tokens = frozenset(tokenize(part))
+        if tokens:
+            aliases.append(tokens)
+    return aliases
+
+
+def mentions_topic(question, aliases):
+    """True if the question names the topic by any of its aliases."""
+    tokens = set(tokenize(question))
+    return any(alias <= tokens for alias in aliases)
+
+
+def answers_question(question, aliases):
+    """True if an overview answer about the topic can be served for question.
+
+    The question must name the topic and ask nothing more specific than an overview:
+    "What did you do at HPE?" and "How does HackOps Recon work?" are served, "Who funded
+    HackOps Recon?" is not.
+    """
+    if not mentions_topic(question, aliases):
+        return False
+    topic_tokens = frozenset().union(*aliases)
+    return set(tokenize(question)) - topic_tokens <= PREFETCH_OVERVIEW_WORDS
+
+
+class FollowUpPredictor:
+    """Predicts follow-up questions from persona topics relevant to the last exchange."""
+
+    def __init__(self, persona_index=None):
+        self.persona_index = persona_index or get_persona_index()
+        self.topics = []
+        self.aliases = {}  # Predicted question -> token sets that identify its topic
+        for section in self.persona_index.sections:
+            if section["title"] not in PREFETCH_TOPIC_SECTIONS:
+                continue
+            found = TOPIC_PATTERN.search(section["text"])
+            if found:
+                # "Internships – Hewlett Packard Enterprise (HPE):" -> "Hewlett Packard Enterprise (HPE)"
+                name = found.group(1).rstrip(":").split("–")[-1].strip()
+                question = f"Tell me more about {name}"
+                self.topics.append((id(section), question))
+                self.aliases[question] = topic_aliases(name)
+
+    def predict(self, conversation, limit=PREFETCH_MAX_QUESTIONS):
+        """Return up to limit follow-up questions, most relevant first."""
+        recent = " ".join(turn["content"] for turn in conversation[-2:])
+        asked = [turn["content"] for turn in conversation if turn["role"] == "user"]
+        ranked = self.persona_index.search(recent, top_k=len(self.persona_index.sections))
+        scores = {id(section): score for score, section in ranked}
+
+        questions = []
+        for section_id, question in sorted(self.topics, key=lambda t: -scores.get(t[0], 0.0)):
+            if scores.get(section_id, 0.0) <= 0:
+                break
+            if any(mentions_topic(previous, self.aliases[question]) for previous in asked):
+                continue
+            questions.append(question)
+            if len(questions) >= limit:
+                break
+        return questions
+
+
+class Prefetcher:
+    """Background worker that answers predicted follow-ups while the user is listening."""
+
+    def __init__(self, llm_service, tts_service, predictor=None):
+        self.llm_service = llm_service
+        self.tts_service = tts_service
+        self.predictor = predictor or FollowUpPredictor()
+        self.results = {}
+        self.context = None
+        self.pending = None
+        self.thread = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def schedule(self, conversation):
+        """Remember the conversation to prefetch for; work starts with start_pending()."""
+        self.reset()
+        self.pending = list(conversation)
+
+    def start_pending(self, llm_service=None):
+        """Start prefetching for the scheduled conversation, after the main reply has been handled.
+
+        Pass the current rerun's llm_service so prefetching follows its settings (e.g. prompt mode).
+        """
+        if llm_service is not None:
+            self.llm_service = llm_service
+        if self.pending is None:
+            return
+        conversation, self.pending = self.pending, None
+        questions = self.predictor.predict(conversation)
+        if not questions:
+            return
+
+        self.cancel_event = threading.Event()
+        with self._lock:
+            self.context = conversation_key(conversation)
+        self.thread = threading.Thread(
+            target=self._run,
+            args=(self.llm_service, conversation, questions, self.cancel_event),
+            daemon=True
+        )
+        self.thread.start()
+
+    def _run(self, llm_service, conversation, questions, cancel_event):
+        """Answer one predicted question at a time, checking for cancellation between steps."""
+        for question in questions:
+            if cancel_event.is_set():
+                return
+            metrics.increment("prefetch.questions")
+            try:
+                answer, tokens = llm_service.generate_response_with_usage(
+                    question, conversation, metric_prefix="prefetch.llm"
+                )
+            except Exception:
+                continue
+            metrics.increment("prefetch.tokens", tokens)
+            if not answer:
+                metrics.increment("prefetch.wasted_tokens", tokens)
+                continue
+
+            # A cancelled answer is still kept; it just goes without prefetched speech
+            audio_file = None if cancel_event.is_set() else self.tts_service.generate_speech(answer)
+            with self._lock:
+                if self.context != conversation_key(conversation):
+                    stale = {"tokens": tokens, "audio_file": audio_file}
+                else:
+                    self.results[question] = {"answer": answer, "audio_file": audio_file, "tokens": tokens}
+                    stale = None
+            if stale:
+                self._discard(stale)
+                return
+
+    def cancel(self):
+        """Stop outstanding prefetch work; answers that are already done stay available."""
+        self.cancel_event.set()
+        self.pending = None
+
+    def reset(self):
+        """Cancel outstanding work and discard unused results."""
+        self.cancel()
+        with self._lock:
+            stale, self.results, self.context = list(self.results.values()), {}, None
+        for entry in stale:
+            self._discard(entry)
+
+    def _discard(self, entry):
+        metrics.increment("prefetch.wasted_tokens", entry["tokens"])
+        audio_file = entry.get("audio_file")
+        if audio_file and os.path.exists(audio_file):
+            os.unlink(audio_file)
+
+    def lookup(self, transcript, conversation_history):
+        """Return a prefetched {"answer", "audio_file"} matching the transcript, or None.
+
+        Prefetched answers are only reused for the conversation state they were generated for.
+        """
+        with self._lock:
+            if not self.results or self.context != conversation_key(conversation_history):
+                return None
+            metrics.increment("prefetch.lookups")
+            matches = [q for q in self.results if answers_question(transcript, self.predictor.aliases[q])]
+            if not matches:
+                return None
+            entry = self.results.pop(matches[0])
+
+        metrics.increment("prefetch.hits")
+        metrics.increment("prefetch.served_tokens", entry["tokens"])
+        return entry
+
+    @staticmethod
+    def stats():
+        """Return prefetch hit rate and token cost."""
+        counters = metrics.snapshot()["counters"]
+        lookups = counters.get("prefetch.lookups", 0)
+        return {
+            "questions": counters.get("prefetch.questions", 0),
+            "lookups": lookups,
+            "hits": counters.get("prefetch.hits", 0),
+            "hit_rate": counters.get("prefetch.hits", 0) / lookups if lookups else 0.0,
+            "tokens": counters.get("prefetch.tokens", 0),
+            "wasted_tokens": counters.get("prefetch.wasted_tokens", 0),
+        }
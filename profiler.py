@@ -0,0 +1,102 @@
+"""
+On-demand profiling for the VoiceBot application.
+Captures a cProfile of a whole Streamlit rerun when requested by query parameter,
+sidebar toggle or sampling, and keeps the profiles in a bounded directory.
+"""
+
+import cProfile
+import datetime
+import os
+import pstats
+from contextlib import contextmanager
+import streamlit as st
+from config import (
+    PROFILE_QUERY_PARAM,
+    PROFILE_SAMPLE_EVERY_N_RERUNS,
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+    PROFILE_TOP_N,
+)
+
+
+class RerunProfiler:
+    """Decides when to profile a rerun, captures it, and summarizes the hottest functions."""
+
+    def __init__(self, profile_dir=PROFILE_DIR, max_files=PROFILE_MAX_FILES, top_n=PROFILE_TOP_N):
+        self.profile_dir = profile_dir
+        self.max_files = max_files
+        self.top_n = top_n
+
+    def should_profile(self):
+        """Return True if this rerun was requested or sampled for profiling."""
+        if st.query_params.get(PROFILE_QUERY_PARAM) in ("1", "true"):
+            return True
+        if st.session_state.get("profile_reruns"):
+            return True
+        if PROFILE_SAMPLE_EVERY_N_RERUNS:
+            count = st.session_state.get("profile_rerun_count", 0) + 1
+            st.session_state.profile_rerun_count = count
+            return count % PROFILE_SAMPLE_EVERY_N_RERUNS == 0
+        return False
+
+    @contextmanager
+    def capture(self):
+        """Profile the enclosed block; results are saved even if it ends with st.rerun()."""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; another session holds it
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._save(profile)
+
+    def _save(self, profile):
+        """Write the profile to the rotating directory and keep a summary for the UI."""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(self.profile_dir, f"rerun-{timestamp}.prof")
+        profile.dump_stats(path)
+        self._rotate()
+
+        stats = pstats.Stats(profile)
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{function} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "own_ms": own * 1000,
+                "cumulative_ms": cumulative * 1000,
+            })
+        rows.sort(key=lambda row: row["own_ms"], reverse=True)
+        st.session_state.last_profile = {
+            "path": path,
+            "total_ms": stats.total_tt * 1000,
+            "rows": rows[:self.top_n],
+        }
+
+    def _rotate(self):
+        """Delete the oldest profiles beyond max_files."""
+        profiles = sorted(
+            os.path.join(self.profile_dir, name)
+            for name in os.listdir(self.profile_dir) if name.endswith(".prof")
+        )
+        for path in profiles[:max(0, len(profiles) - self.max_files)]:
+            os.unlink(path)
+
+    def render_controls(self):
+        """Sidebar toggle for profiling plus the hot functions of the last profiled rerun."""
+        st.toggle(
+            "Profile reruns",
+            key="profile_reruns",
+            help=f"Or add ?{PROFILE_QUERY_PARAM}=1 to the URL"
+        )
+        last_profile = st.session_state.get("last_profile")
+        if last_profile:
+            with st.expander(f"⏱️ Last profile ({last_profile['total_ms']:.0f} ms)"):
+                st.caption(last_profile["path"])
+                st.dataframe(last_profile["rows"], hide_index=True, use_container_width=True)
@@ -6,12 +6,28 @@ Handles conversation management, UI rendering, and user interactions.
 import os
 import tempfile
 import datetime
+import re
+import time
 import streamlit as st
 from audio_recorder import AudioRecorder
 from stt_service import STTService
 from tts_service import TTSService
 from llm_service import LLMService
-from config import PAGE_CONFIG
+from prefetcher import Prefetcher
+from memory_governor import MemoryGovernor, current_rss_bytes, session_gauges
+from profiler import RerunProfiler
+from metrics import metrics
+from config import (
+    PAGE_CONFIG,
+    TTS_STREAMING_ENABLED,
+    PREFETCH_ENABLED,
+    MEMORY_GOVERNOR_ENABLED,
+    VAD_RMS_THRESHOLD,
+    BARGE_IN_RMS_THRESHOLD,
+    SPEECH_WORDS_PER_SECOND,
+    PLAYBACK_MARGIN_SECONDS,
+    ECHO_OVERLAP_THRESHOLD,
+)
 
 
 class StreamlitUI:
@@ -22,6 +38,8 @@ class StreamlitUI:
         self.stt_service = STTService(groq_client)
         self.tts_service = TTSService(groq_client)
         self.llm_service = LLMService(groq_client)
+        self.memory_governor = MemoryGovernor() if MEMORY_GOVERNOR_ENABLED else None
+        self.profiler = RerunProfiler()
         self.initialize_session_state()
 
     def initialize_session_state(self):
@@ -42,6 +60,16 @@ class StreamlitUI:
             st.session_state.audio_files = {}  # Store audio file paths for each message
         if "trigger_immediate_tts" not in st.session_state:
             st.session_state.trigger_immediate_tts = None  # Store text for immediate TTS
+        if "prefetched_tts_audio" not in st.session_state:
+            st.session_state.prefetched_tts_audio = None  # Prefetched speech for the pending TTS text
+        if "prefetcher" not in st.session_state:
+            st.session_state.prefetcher = Prefetcher(self.llm_service, self.tts_service) if PREFETCH_ENABLED else None
+        if "active_tts_stream" not in st.session_state:
+            st.session_state.active_tts_stream = None  # Reply still streaming while hands-free listens
+        if "playback_until" not in st.session_state:
+            st.session_state.playback_until = 0.0  # Estimated end of the reply's playback (perf_counter)
+        if "end_of_speech_at" not in st.session_state:
+            st.session_state.end_of_speech_at = None  # When the user finished the question being answered
 
     def setup_page_config(self):
         """Configure Streamlit page settings."""
@@ -101,8 +129,14 @@ class StreamlitUI:
                 st.caption(f"STT: {model_config['stt']}")
                 st.caption(f"TTS: {model_config['tts']}")
                 st.caption(f"Voice: {model_config['voice']}")
+                self.render_routing_stats()
+                self.render_prompt_toggle()
+                self.render_prefetch_stats()
             else:
                 st.error("❌ Groq API Not Connected")
+
+            self.render_memory_gauges()
+            self.profiler.render_controls()
             
             # Deepgram Status
             if model_config.get('deepgram_available', False):
@@ -150,6 +184,58 @@ class StreamlitUI:
             else:
                 st.info("No conversations yet. Start chatting to see your history here!")
 
+    def render_routing_stats(self):
+        """Show per-route LLM latency and escalation rate."""
+        stats = self.llm_service.routing_stats()
+        for route, route_stats in stats["routes"].items():
+            if route_stats["calls"]:
+                st.caption(
+                    f"{route.title()} LLM: {route_stats['calls']} calls · "
+                    f"p50 {route_stats['p50'] * 1000:.0f} ms · p95 {route_stats['p95'] * 1000:.0f} ms"
+                )
+        if stats["routes"].get("fast", {}).get("calls"):
+            st.caption(f"Escalation rate: {stats['escalation_rate']:.0%}")
+
+    def render_prompt_toggle(self):
+        """Toggle between the full and retrieved persona prompt and compare their cost."""
+        if self.llm_service.persona_index is None:
+            return
+        retrieved = st.toggle(
+            "Retrieved persona prompt",
+            value=True,
+            key="persona_retrieval",
+            help="Send only the persona sections relevant to each question instead of the full prompt"
+        )
+        self.llm_service.prompt_mode = "retrieved" if retrieved else "full"
+
+        for mode, mode_stats in self.llm_service.prompt_stats().items():
+            latency = " · ".join(
+                f"{route} p50 {route_stats['p50'] * 1000:.0f} ms"
+                for route, route_stats in mode_stats["routes"].items()
+            )
+            st.caption(
+                f"{mode.title()} prompt: ~{mode_stats['mean_prompt_tokens']:.0f} tokens · "
+                f"{latency} over {mode_stats['turns']} turns"
+            )
+
+    def render_prefetch_stats(self):
+        """Show prefetch hit rate and token cost."""
+        if st.session_state.prefetcher is None:
+            return
+        stats = st.session_state.prefetcher.stats()
+        if stats["questions"]:
+            st.caption(
+                f"Prefetch: {stats['hits']}/{stats['lookups']} hits ({stats['hit_rate']:.0%}) · "
+                f"{stats['wasted_tokens']} of {stats['tokens']} tokens wasted"
+            )
+
+    def render_memory_gauges(self):
+        """Show this session's approximate footprint and the process RSS."""
+        if self.memory_governor is None:
+            return
+        session_mb = session_gauges().get(self.memory_governor.session_id, 0) / 2**20
+        st.caption(f"🧠 Session ~{session_mb:.1f} MB · Process {current_rss_bytes() / 2**20:.0f} MB")
+
     def render_main_interface(self, groq_available, model_config):
         """Render the main chat interface."""
         # Main chat area
@@ -191,33 +277,125 @@ class StreamlitUI:
     def render_immediate_tts_section(self):
         """Render the immediate TTS trigger section."""
         if st.session_state.trigger_immediate_tts:
+            text = st.session_state.trigger_immediate_tts
             with st.spinner("🔊 Generating and playing speech response..."):
-                audio_file = self.tts_service.generate_speech(st.session_state.trigger_immediate_tts)
+                audio_file = st.session_state.prefetched_tts_audio
+                st.session_state.prefetched_tts_audio = None
+                first_audio_at = None
                 if audio_file:
-                    # Save audio file for conversation history - use the last assistant message index
-                    # Find the last assistant message in the conversation
-                    last_assistant_index = -1
-                    for i in range(len(st.session_state.current_conversation) - 1, -1, -1):
-                        if st.session_state.current_conversation[i]["role"] == "assistant":
-                            last_assistant_index = i
-                            break
-                    
-                    if last_assistant_index >= 0:
-                        message_key = f"msg_{last_assistant_index}"
-                        st.session_state.audio_files[message_key] = audio_file
-                    
-                    # Play audio immediately
                     self.tts_service.play_audio_immediately(audio_file)
+                    first_audio_at = time.perf_counter()
+                elif TTS_STREAMING_ENABLED:
+                    # Hands-free listens for barge-in while the reply is still streaming
+                    audio_file = self.play_streaming_tts(text, wait=not st.session_state.get("hands_free"))
+                    if audio_file:
+                        first_audio_at = st.session_state.active_tts_stream.first_byte_at
+
+                if audio_file is None:
+                    audio_file = self.tts_service.generate_speech(text)
+                    if audio_file:
+                        # Play audio immediately
+                        self.tts_service.play_audio_immediately(audio_file)
+                        first_audio_at = time.perf_counter()
+
+                if audio_file:
+                    self.store_last_assistant_audio(audio_file)
+                    self.record_turn_latency(text, first_audio_at)
                 else:
                     st.error("❌ Failed to generate speech. Please check your API configuration.")
             
             # Clear the trigger
             st.session_state.trigger_immediate_tts = None
 
+            # The reply is out; use the idle time to prepare likely follow-ups
+            if st.session_state.prefetcher is not None:
+                st.session_state.prefetcher.start_pending(self.llm_service)
+
+    def play_streaming_tts(self, text, wait=True):
+        """Stream TTS to the browser and return the saved clip path, or None to fall back.
+
+        With wait=False the clip path is returned as soon as playback starts and the
+        stream is left in st.session_state.active_tts_stream so a barge-in can cancel it.
+        """
+        streaming = self.tts_service.generate_speech_streaming(text)
+        if streaming is None:
+            return None
+
+        stream_url, stream, audio_file = streaming
+        self.tts_service.play_audio_stream(stream_url)
+        st.session_state.active_tts_stream = stream
+        if not wait:
+            return audio_file
+
+        # Keep the clip for history once the provider has sent everything
+        stream.wait_until_done()
+        if stream.failed:
+            # Part of the reply has already played; keep it rather than playing it again from the start
+            st.warning("⚠️ Speech stream was interrupted. The full reply is in the text above.")
+            return audio_file
+
+        st.caption(
+            f"⏱️ First audio in {stream.first_byte_seconds * 1000:.0f} ms · "
+            f"full synthesis {stream.total_seconds * 1000:.0f} ms"
+        )
+        return audio_file
+
+    def record_turn_latency(self, text, first_audio_at):
+        """Estimate how long the reply plays and report end-of-speech to first-audio latency."""
+        st.session_state.playback_until = first_audio_at + len(text.split()) / SPEECH_WORDS_PER_SECOND
+        end_of_speech_at = st.session_state.end_of_speech_at
+        st.session_state.end_of_speech_at = None
+        if end_of_speech_at is not None:
+            latency = first_audio_at - end_of_speech_at
+            metrics.record_timing("turn.eos_to_first_audio", latency)
+            st.caption(f"⏱️ You stopped speaking → first audio in {latency * 1000:.0f} ms")
+
+    def last_assistant_message(self):
+        """Return the text of the last assistant message, or an empty string."""
+        for message in reversed(st.session_state.current_conversation):
+            if message["role"] == "assistant":
+                return message["content"]
+        return ""
+
+    @staticmethod
+    def is_echo(transcript, reply):
+        """True if nearly every word of the transcript also occurs in the reply."""
+        words = re.findall(r"[a-z0-9']+", transcript.lower())
+        reply_words = set(re.findall(r"[a-z0-9']+", reply.lower()))
+        if not words:
+            return False
+        return sum(word in reply_words for word in words) / len(words) >= ECHO_OVERLAP_THRESHOLD
+
+    def last_assistant_audio_key(self):
+        """Return the audio_files key of the last assistant message, or None."""
+        for i in range(len(st.session_state.current_conversation) - 1, -1, -1):
+            if st.session_state.current_conversation[i]["role"] == "assistant":
+                return f"msg_{i}"
+        return None
+
+    def store_last_assistant_audio(self, audio_file):
+        """Attach an audio file to the last assistant message for conversation history."""
+        key = self.last_assistant_audio_key()
+        if key is not None:
+            st.session_state.audio_files[key] = audio_file
+
     def render_voice_input_controls(self):
         """Render voice input controls."""
         st.markdown("---")
 
+        hands_free = st.toggle(
+            "🔁 Hands-free conversation",
+            key="hands_free",
+            help="Listen automatically after each reply; start talking to interrupt the bot"
+        )
+        recorder = st.session_state.audio_recorder
+        if hands_free:
+            self.run_hands_free_turn()
+            return
+        if recorder.listening:
+            # Hands-free was just switched off
+            recorder.stop_listening()
+
         # Voice input controls
         if st.session_state.recording:
             if st.button("⏹️ Stop Recording", type="primary", use_container_width=True, key="stop_recording_visual"):
@@ -232,6 +410,73 @@ class StreamlitUI:
         if st.session_state.recording:
             self.render_recording_status()
 
+    def run_hands_free_turn(self):
+        """Listen for the next utterance, barging in on playback, and process it when it ends."""
+        recorder = st.session_state.audio_recorder
+        if st.session_state.recording:
+            # A push-to-talk recording was in progress; hands-free takes over the microphone
+            st.session_state.recording = False
+            recorder.stop_recording()
+            recorder.release_buffers()
+
+        status = st.empty()
+        handed_off = False
+        try:
+            while True:
+                if not recorder.listening:
+                    recorder.start_listening()
+                vad = recorder.vad
+                heard = False
+                echo = False
+                listen_started = time.perf_counter()
+                while vad.speech_ended_at is None:
+                    playback_until = st.session_state.playback_until
+                    # Require louder speech while the reply may still be audible so its echo is not
+                    # mistaken for the user; the browser starts playing later than the server estimate
+                    audible = time.perf_counter() < playback_until + PLAYBACK_MARGIN_SECONDS
+                    vad.threshold = BARGE_IN_RMS_THRESHOLD if audible else VAD_RMS_THRESHOLD
+                    if vad.speech_started_at is not None and not heard:
+                        heard = True
+                        onset = vad.speech_started_at
+                        echo = playback_until <= onset < playback_until + PLAYBACK_MARGIN_SECONDS
+                        if not echo:
+                            # The user is speaking again; stop spending on predicted follow-ups
+                            if st.session_state.prefetcher is not None:
+                                st.session_state.prefetcher.cancel()
+                            if onset < playback_until:
+                                self.barge_in(onset)
+                    # Updating the status each poll also lets Streamlit interrupt this loop on a rerun
+                    listened = time.perf_counter() - listen_started
+                    label = "🗣️ Hearing you..." if vad.speech_started_at is not None else "👂 Listening... just start talking"
+                    status.info(f"{label} ({listened:.0f}s)")
+                    vad.wait(0.25)
+
+                audio_data = recorder.take_utterance()
+                status.empty()
+                st.session_state.end_of_speech_at = vad.speech_ended_at
+                # Speech right after the reply may be its tail picked up by the microphone
+                echo_of = self.last_assistant_message() if echo else None
+                if audio_data is not None and self.process_voice_input(audio_data, echo_of):
+                    handed_off = True
+                    st.rerun()
+        finally:
+            if not handed_off and recorder.listening:
+                recorder.stop_listening()
+
+    def barge_in(self, speech_started_at):
+        """Stop the reply that is playing and cancel its outstanding speech synthesis."""
+        stream = st.session_state.active_tts_stream
+        st.session_state.active_tts_stream = None
+        if stream is not None and stream.cancel():
+            # The producer deletes the truncated clip; forget it in the history too
+            key = self.last_assistant_audio_key()
+            if key is not None:
+                st.session_state.audio_files.pop(key, None)
+        self.tts_service.stop_playback()
+        st.session_state.playback_until = 0.0
+        metrics.increment("turn.barge_ins")
+        metrics.record_timing("turn.barge_in_reaction", time.perf_counter() - speech_started_at)
+
     def render_recording_status(self):
         """Render the recording status animation."""
         st.markdown("""
@@ -263,8 +508,8 @@ class StreamlitUI:
         """Trigger immediate TTS for the given text."""
         st.session_state.trigger_immediate_tts = text
 
-    def add_assistant_response(self, response):
-        """Add assistant response to conversation and trigger TTS."""
+    def add_assistant_response(self, response, audio_file=None):
+        """Add assistant response to conversation and trigger TTS (or play already prepared audio)."""
         if response:
             st.session_state.current_conversation.append({
                 "role": "assistant",
@@ -275,6 +520,10 @@ class StreamlitUI:
             
             # Trigger immediate TTS
             self.trigger_immediate_tts(response)
+            st.session_state.prefetched_tts_audio = audio_file
+
+            if st.session_state.prefetcher is not None:
+                st.session_state.prefetcher.schedule(st.session_state.current_conversation)
             return True
         return False
 
@@ -316,21 +565,32 @@ class StreamlitUI:
         """Start a new conversation."""
         self.save_conversation()
         st.session_state.current_conversation = []
+        if st.session_state.prefetcher is not None:
+            st.session_state.prefetcher.reset()
 
     def load_conversation(self, conversation_id):
         """Load a conversation from history."""
         for conv in st.session_state.conversations:
             if conv["id"] == conversation_id:
-                st.session_state.current_conversation = conv["messages"].copy()
+                messages = self.memory_governor.load_messages(conv) if self.memory_governor else conv["messages"]
+                st.session_state.current_conversation = messages.copy()
+                if st.session_state.prefetcher is not None:
+                    st.session_state.prefetcher.reset()
                 break
 
     def delete_conversation(self, conversation_id):
         """Delete a conversation from history."""
+        for conv in st.session_state.conversations:
+            if conv["id"] == conversation_id:
+                MemoryGovernor.discard_offloaded(conv)
         st.session_state.conversations = [conv for conv in st.session_state.conversations if conv["id"] != conversation_id]
 
     def start_voice_recording(self):
         """Start voice recording."""
         if not st.session_state.recording:
+            # The user is speaking again; stop spending on predicted follow-ups
+            if st.session_state.prefetcher is not None:
+                st.session_state.prefetcher.cancel()
             st.session_state.recording = True
             st.session_state.audio_recorder.start_recording()
             st.success("🎤 Recording started! Speak now...")
@@ -339,38 +599,78 @@ class StreamlitUI:
         """Stop voice recording and process audio."""
         if st.session_state.recording:
             st.session_state.recording = False
+            st.session_state.end_of_speech_at = time.perf_counter()
             audio_data = st.session_state.audio_recorder.stop_recording()
+            st.session_state.audio_recorder.release_buffers()
             
             if audio_data is not None:
-                with st.spinner("Converting speech to text..."):
-                    transcript = self.stt_service.transcribe_audio_data(audio_data)
-                    
-                if transcript:
-                    # Add user message to conversation
-                    st.session_state.current_conversation.append({
-                        "role": "user",
-                        "content": transcript
-                    })
-                    
-                    # Generate and add assistant response
-                    with st.spinner("Generating response..."):
-                        response = self.llm_service.generate_response(transcript, st.session_state.current_conversation[:-1])
-                    
-                    if self.add_assistant_response(response):
-                        st.success("✅ Voice message processed successfully!")
-                        return True
-                else:
-                    st.error("❌ Failed to transcribe audio. Please try again.")
-            else:
-                st.error("❌ No audio recorded. Please try again.")
+                return self.process_voice_input(audio_data)
+            st.error("❌ No audio recorded. Please try again.")
         
         return False
 
+    def process_voice_input(self, audio_data, echo_of=None):
+        """Transcribe recorded audio and answer it; return True if a reply was added.
+
+        If echo_of is given, a transcript that mostly repeats that text is ignored as echo.
+        """
+        with st.spinner("Converting speech to text..."):
+            transcript = self.stt_service.transcribe_audio_data(audio_data)
+
+        if not transcript:
+            st.error("❌ Failed to transcribe audio. Please try again.")
+            return False
+
+        if echo_of is not None:
+            if self.is_echo(transcript, echo_of):
+                metrics.increment("turn.echo_ignored")
+                st.info(f"🔇 Ignored \"{transcript}\" because it sounded like my own reply. Please repeat it if that was you.")
+                return False
+            # It was the user after all; stop spending on predicted follow-ups
+            if st.session_state.prefetcher is not None:
+                st.session_state.prefetcher.cancel()
+
+        # Add user message to conversation
+        st.session_state.current_conversation.append({
+            "role": "user",
+            "content": transcript
+        })
+
+        # Serve a prefetched answer if the question was predicted, otherwise generate one
+        history = st.session_state.current_conversation[:-1]
+        prefetched = None
+        if st.session_state.prefetcher is not None:
+            prefetched = st.session_state.prefetcher.lookup(transcript, history)
+
+        if prefetched:
+            response, audio_file = prefetched["answer"], prefetched["audio_file"]
+        else:
+            with st.spinner("Generating response..."):
+                response = self.llm_service.generate_response(transcript, history)
+            audio_file = None
+
+        if self.add_assistant_response(response, audio_file):
+            st.success("✅ Voice message processed successfully!")
+            return True
+        return False
+
 
     def run(self, groq_available, model_config):
-        """Main application runner."""
+        """Main application runner, profiling the rerun when requested."""
+        if self.profiler.should_profile():
+            with self.profiler.capture():
+                self.render_app(groq_available, model_config)
+        else:
+            self.render_app(groq_available, model_config)
+
+    def render_app(self, groq_available, model_config):
+        """Render the page and handle this rerun's interactions."""
         self.setup_page_config()
         self.add_autoplay_script()
+
+        # Keep this session's state within its memory limits
+        if self.memory_governor is not None:
+            self.memory_governor.enforce()
         
         # Render sidebar
         self.render_sidebar(groq_available, model_config)
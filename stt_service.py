@@ -4,60 +4,170 @@ Handles audio transcription using Groq's Whisper API.
 """
 
 import io
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import soundfile as sf
 import streamlit as st
 from groq import Groq
-from config import SAMPLE_RATE, GROQ_MODEL_STT
+from audio_segmenter import split_at_silences, merge_transcripts
+from metrics import metrics
+from transcript_cache import transcript_cache, fingerprint_audio, fingerprint_bytes
+from config import (
+    SAMPLE_RATE,
+    GROQ_MODEL_STT,
+    STT_LANGUAGE,
+    TRANSCRIPT_CACHE_ENABLED,
+    STT_SEGMENTED_MIN_SECONDS,
+    STT_SEGMENT_MAX_WORKERS,
+)
 
 
 class STTService:
     """Handles speech-to-text conversion using Groq's Whisper API."""
-    
-    def __init__(self, groq_client):
+
+    def __init__(self, groq_client, cache=None):
         self.groq_client = groq_client
         self.model = GROQ_MODEL_STT
+        self.language = STT_LANGUAGE
+        self.cache = cache if cache is not None else (transcript_cache if TRANSCRIPT_CACHE_ENABLED else None)
+
+    def _response_to_dict(self, response):
+        """Keep the full verbose_json payload so segment timestamps survive caching."""
+        if hasattr(response, "model_dump"):
+            return response.model_dump()
+        return {"text": response.text}
+
+    def _cached_response(self, key):
+        """Return the cached verbose_json response for a fingerprint, or None."""
+        if self.cache is None:
+            return None
+        return self.cache.get(key)
+
+    def _transcribe_and_cache(self, key, file):
+        """Transcribe with Groq Whisper and cache the full verbose_json response."""
+        response = self.groq_client.audio.transcriptions.create(
+            file=file,
+            model=self.model,
+            language=self.language,  # Force English language
+            response_format="verbose_json",
+        )
+        result = self._response_to_dict(response)
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
 
-    def transcribe_audio_file(self, audio_file_path):
-        """Transcribe audio from a file path using Groq Whisper Large v3."""
+    def _read_file(self, audio_file_path):
+        """Return (fingerprint, samples, sample_rate); samples is None if the file cannot be decoded locally."""
         try:
+            samples, sample_rate = sf.read(audio_file_path, dtype="float32")
+            return fingerprint_audio(samples, sample_rate, self.model, self.language), samples, sample_rate
+        except Exception:
             with open(audio_file_path, "rb") as audio_file:
-                # Use Groq's Whisper API with English language specification
-                response = self.groq_client.audio.transcriptions.create(
-                    model=self.model,
-                    file=audio_file,
-                    language="en",  # Force English language
-                    response_format="verbose_json"
-                )
-            return response.text
+                return fingerprint_bytes(audio_file.read(), self.model, self.language), None, None
+
+    @staticmethod
+    def _segmented_key(key):
+        """Cache key for the merged result of a segmented run, kept apart from single-request results."""
+        return f"{key}-segmented"
+
+    def _should_segment(self, samples, sample_rate, segmented):
+        """Segment when asked to, or automatically for audio longer than STT_SEGMENTED_MIN_SECONDS."""
+        if segmented is not None:
+            return segmented
+        return len(samples) / sample_rate > STT_SEGMENTED_MIN_SECONDS
+
+    def _transcribe_window(self, samples, sample_rate):
+        """Transcribe one window of samples through the cache."""
+        key = fingerprint_audio(samples, sample_rate, self.model, self.language)
+        result = self._cached_response(key)
+        if result is None:
+            audio_bytes = io.BytesIO()
+            sf.write(audio_bytes, samples, sample_rate, format='WAV')
+            result = self._transcribe_and_cache(key, ("segment.wav", audio_bytes.getvalue()))
+        return result
+
+    def _transcribe_segmented(self, key, samples, sample_rate):
+        """Transcribe overlapping silence-cut windows concurrently and merge them onto one timeline."""
+        start = time.perf_counter()
+        # Downmix to mono so windows are cut on the same timeline for every channel
+        samples = samples.reshape(len(samples), -1).mean(axis=1)
+        windows = split_at_silences(samples, sample_rate)
+        with ThreadPoolExecutor(max_workers=min(STT_SEGMENT_MAX_WORKERS, len(windows))) as pool:
+            responses = list(pool.map(
+                lambda window: self._transcribe_window(samples[window["start"]:window["end"]], sample_rate),
+                windows
+            ))
+        result = merge_transcripts(windows, responses, sample_rate)
+
+        metrics.increment("stt.segments", len(windows))
+        metrics.record_timing("stt.segmented", time.perf_counter() - start)
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+
+    def transcribe_audio_file(self, audio_file_path, verbose=False, segmented=None):
+        """Transcribe audio from a file path using Groq Whisper Large v3.
+
+        Returns the transcript text, or the full verbose_json response dict if verbose is True.
+        Long files (or any file with segmented=True) are transcribed as concurrent overlapping
+        windows; files that cannot be decoded locally are always sent as one request.
+        """
+        try:
+            key, samples, sample_rate = self._read_file(audio_file_path)
+            segment = samples is not None and self._should_segment(samples, sample_rate, segmented)
+            if segment:
+                key = self._segmented_key(key)
+            result = self._cached_response(key)
+            if result is None and segment:
+                result = self._transcribe_segmented(key, samples, sample_rate)
+            elif result is None:
+                with open(audio_file_path, "rb") as audio_file:
+                    result = self._transcribe_and_cache(key, audio_file)
+            return result if verbose else result["text"]
         except Exception as e:
             st.error(f"Error transcribing audio with Groq: {str(e)}")
             return None
 
-    def transcribe_audio_data(self, audio_data):
-        """Transcribe audio data directly from numpy array."""
+    def transcribe_audio_data(self, audio_data, verbose=False, segmented=None):
+        """Transcribe audio data directly from numpy array.
+
+        Returns the transcript text, or the full verbose_json response dict if verbose is True.
+        Long recordings (or any recording with segmented=True) are transcribed as concurrent
+        overlapping windows.
+        """
         try:
             # Normalize audio data
             audio_data = audio_data / np.max(np.abs(audio_data))
-            
+            key = fingerprint_audio(audio_data, SAMPLE_RATE, self.model, self.language)
+            segment = self._should_segment(audio_data, SAMPLE_RATE, segmented)
+            if segment:
+                key = self._segmented_key(key)
+            result = self._cached_response(key)
+            if result is not None:
+                return result if verbose else result["text"]
+
+            if segment:
+                try:
+                    result = self._transcribe_segmented(key, audio_data, SAMPLE_RATE)
+                    return result if verbose else result["text"]
+                except Exception as e:
+                    st.error(f"Groq transcription failed: {e}")
+                    return None
+
             # Convert to bytes
             audio_bytes = io.BytesIO()
             sf.write(audio_bytes, audio_data, SAMPLE_RATE, format='WAV')
             audio_bytes.seek(0)
-            
+
             # Use Groq for transcription
             try:
-                transcription = self.groq_client.audio.transcriptions.create(
-                    file=("recording.wav", audio_bytes.read()),
-                    model=self.model,
-                    language="en",  # Force English language
-                    response_format="verbose_json",
-                )
-                return transcription.text
+                result = self._transcribe_and_cache(key, ("recording.wav", audio_bytes.read()))
+                return result if verbose else result["text"]
             except Exception as e:
                 st.error(f"Groq transcription failed: {e}")
                 return None
-                
+
         except Exception as e:
             st.error(f"Transcription error: {e}")
             return None
@@ -0,0 +1,42 @@
+"""
+Tests for merging per-window transcripts in audio_segmenter.py.
+"""
+
+from audio_segmenter import merge_transcripts
+
+SAMPLE_RATE = 16000
+
+
+def make_window(start_seconds, end_seconds, own_start, own_end):
+    return {
+        "start": int(start_seconds * SAMPLE_RATE),
+        "end": int(end_seconds * SAMPLE_RATE),
+        "own_start": own_start,
+        "own_end": own_end,
+    }
+
+
+def test_merge_keeps_text_of_windows_without_segments():
+    windows = [make_window(0, 31, 0.0, 30.0), make_window(29, 60, 30.0, 60.0)]
+    responses = [
+        {"text": "first part", "segments": [{"id": 0, "start": 1.0, "end": 3.0, "text": "first part"}]},
+        {"text": "second part", "segments": []},
+    ]
+
+    merged = merge_transcripts(windows, responses, SAMPLE_RATE)
+
+    assert merged["text"] == "first part second part"
+    assert [s["id"] for s in merged["segments"]] == [0, 1]
+    assert (merged["segments"][1]["start"], merged["segments"][1]["end"]) == (30.0, 60.0)
+
+
+def test_merge_keeps_window_order_when_first_window_has_no_segments():
+    windows = [make_window(0, 31, 0.0, 30.0), make_window(29, 60, 30.0, 60.0)]
+    responses = [
+        {"text": "first part"},
+        {"text": "second part", "segments": [{"id": 0, "start": 2.0, "end": 4.0, "text": "second part"}]},
+    ]
+
+    merged = merge_transcripts(windows, responses, SAMPLE_RATE)
+
+    assert merged["text"] == "first part second part"
@@ -0,0 +1,52 @@
+"""
+Tests for LLM routing and the fast-answer quality check in llm_service.py.
+"""
+
+import pytest
+from llm_service import LLMService
+
+
+@pytest.fixture(scope="module")
+def service():
+    return LLMService(groq_client=None)
+
+
+@pytest.mark.parametrize("message, route", [
+    ("hi", "fast"),
+    ("Thanks, that was helpful!", "fast"),
+    ("Where did you study?", "fast"),
+    ("What is your current role?", "fast"),
+    ("Why did you move into AI engineering?", "large"),
+    ("Walk me through HackOps Recon", "large"),
+    ("What's your #1 superpower?", "large"),
+    ("Tell me about the hardest bug you have fixed in a production system last year", "large"),
+])
+def test_classify_request(service, message, route):
+    assert service.classify_request(message, []) == route
+
+
+def test_long_conversations_go_to_the_large_model(service):
+    history = [{"role": "user", "content": "hello"}] * 10
+    assert service.classify_request("What is your current role?", history) == "large"
+    # Greetings stay fast however long the conversation is
+    assert service.classify_request("thanks, bye", history) == "fast"
+
+
+def test_short_answers_pass_for_fast_intents(service):
+    assert service.passes_quality_check("Hey there! Great to meet you.", "stop", fast_intent=True)
+    assert not service.passes_quality_check("Hey there! Great to meet you.", "stop")
+    assert not service.passes_quality_check("", "stop", fast_intent=True)
+
+
+@pytest.mark.parametrize("answer, finish_reason", [
+    ("I built an agent that automates reconnaissance for security teams", "length"),
+    ("As an AI, I cannot share details about my past roles at companies.", "stop"),
+    ("I'm not sure what you mean, could you rephrase the question please?", "stop"),
+])
+def test_truncated_or_evasive_answers_fail(service, answer, finish_reason):
+    assert not service.passes_quality_check(answer, finish_reason, fast_intent=True)
+
+
+def test_fast_intent_excludes_large_patterns(service):
+    assert service.is_fast_intent("hello")
+    assert not service.is_fast_intent("Hi, why did you pick AI?")
@@ -0,0 +1,60 @@
+"""
+Tests for follow-up prediction and prefetched-answer matching in prefetcher.py.
+"""
+
+import pytest
+from prefetcher import FollowUpPredictor, answers_question, topic_aliases
+
+HPE = "Tell me more about Hewlett Packard Enterprise (HPE)"
+HACKOPS = "Tell me more about HackOps Recon"
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    return FollowUpPredictor()
+
+
+def test_topic_aliases_include_acronym_and_full_name():
+    assert set(topic_aliases("Hewlett Packard Enterprise (HPE)")) == {
+        frozenset({"hpe"}),
+        frozenset({"hewlett", "packard", "enterprise"}),
+    }
+    # Multi-word parentheticals describe the topic rather than name it
+    assert topic_aliases("TheAgentic (AI Developer)") == [frozenset({"theagentic"})]
+
+
+@pytest.mark.parametrize("question", [
+    "What did you do at HPE?",
+    "Tell me more about HPE",
+    "What was your role at Hewlett Packard Enterprise?",
+])
+def test_hpe_overview_questions_are_served(predictor, question):
+    assert answers_question(question, predictor.aliases[HPE])
+
+
+@pytest.mark.parametrize("question, served", [
+    ("How does HackOps Recon work?", True),
+    ("Explain the HackOps Recon project", True),
+    ("Who built HackOps Recon?", False),
+    ("Who funded HackOps Recon?", False),
+    ("What tech stack did HackOps Recon use?", False),
+    ("What did you do at HPE?", False),
+])
+def test_hackops_questions(predictor, question, served):
+    assert answers_question(question, predictor.aliases[HACKOPS]) is served
+
+
+def test_predict_suggests_topics_from_the_last_exchange(predictor):
+    conversation = [
+        {"role": "user", "content": "Where did you intern?"},
+        {"role": "assistant", "content": "I interned at Hewlett Packard Enterprise working on AI tooling."},
+    ]
+    assert predictor.predict(conversation, limit=2)[0] == HPE
+
+
+def test_predict_skips_topics_already_asked_about(predictor):
+    conversation = [
+        {"role": "user", "content": "What did you do at HPE?"},
+        {"role": "assistant", "content": "I interned at Hewlett Packard Enterprise working on AI tooling."},
+    ]
+    assert HPE not in predictor.predict(conversation, limit=5)
@@ -0,0 +1,68 @@
+"""
+Tests for transcript caching across transcription modes in stt_service.py.
+"""
+
+import sys
+import types
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+try:
+    import sounddevice  # noqa: F401
+except OSError:
+    # Not needed for transcription; headless hosts usually lack PortAudio
+    sys.modules["sounddevice"] = types.ModuleType("sounddevice")
+
+from config import SAMPLE_RATE
+from stt_service import STTService
+from transcript_cache import TranscriptCache
+
+
+class FakeWhisper:
+    """Returns one segment per request and counts the requests."""
+
+    def __init__(self):
+        self.requests = 0
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._transcribe))
+
+    def _transcribe(self, **kwargs):
+        self.requests += 1
+        text = f"request {self.requests}"
+        return SimpleNamespace(model_dump=lambda: {
+            "text": text,
+            "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": text}],
+        })
+
+
+@pytest.fixture
+def service(tmp_path):
+    return STTService(FakeWhisper(), cache=TranscriptCache(cache_dir=str(tmp_path)))
+
+
+@pytest.fixture
+def audio():
+    rng = np.random.default_rng(0)
+    return rng.uniform(-0.5, 0.5, size=(SAMPLE_RATE * 70, 1)).astype(np.float32)
+
+
+def test_segmented_result_is_not_served_for_a_single_request(service, audio):
+    segmented = service.transcribe_audio_data(audio, verbose=True, segmented=True)
+    requests = service.groq_client.requests
+
+    single = service.transcribe_audio_data(audio, verbose=True, segmented=False)
+
+    assert service.groq_client.requests == requests + 1
+    assert len(single["segments"]) == 1
+    assert service.transcribe_audio_data(audio, verbose=True, segmented=True) == segmented
+
+
+def test_cache_hits_are_copies(service, audio):
+    first = service.transcribe_audio_data(audio, verbose=True, segmented=False)
+    first["text"] = "edited"
+    first["segments"].clear()
+
+    again = service.transcribe_audio_data(audio, verbose=True, segmented=False)
+
+    assert again["text"] == "request 1"
+    assert len(again["segments"]) == 1
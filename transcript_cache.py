@@ -0,0 +1,141 @@
+"""
+Transcript cache for the VoiceBot application.
+Keeps verbose_json transcriptions keyed by an audio fingerprint in memory,
+backed by an LRU directory on disk.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from metrics import metrics
+from config import (
+    TRANSCRIPT_CACHE_DIR,
+    TRANSCRIPT_CACHE_MEMORY_ENTRIES,
+    TRANSCRIPT_CACHE_DISK_ENTRIES,
+)
+
+
+def fingerprint_audio(samples, sample_rate, model, language):
+    """Hash peak-normalized 16-bit PCM together with the transcription settings."""
+    samples = np.asarray(samples, dtype=np.float32)
+    peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+    if peak > 0:
+        samples = samples / peak
+    pcm = np.round(np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{model}|{language}|{sample_rate}|{pcm.shape}".encode())
+    digest.update(pcm.tobytes())
+    return digest.hexdigest()
+
+
+def fingerprint_bytes(data, model, language):
+    """Hash raw file bytes when the audio cannot be decoded locally."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{model}|{language}|raw".encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Two-tier LRU cache of verbose_json transcription responses."""
+
+    def __init__(self, cache_dir=TRANSCRIPT_CACHE_DIR,
+                 memory_entries=TRANSCRIPT_CACHE_MEMORY_ENTRIES,
+                 disk_entries=TRANSCRIPT_CACHE_DISK_ENTRIES):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Return a copy of the cached response dict for a fingerprint, or None."""
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                metrics.increment("stt.cache.hit")
+                # Callers may edit the transcript; later hits must not see it
+                return copy.deepcopy(self.memory[key])
+
+        response = self._read_disk(key)
+        if response is None:
+            metrics.increment("stt.cache.miss")
+            return None
+
+        metrics.increment("stt.cache.hit")
+        metrics.increment("stt.cache.disk_hit")
+        self._remember(key, copy.deepcopy(response))
+        return response
+
+    def put(self, key, response):
+        """Store a copy of a response dict in both tiers."""
+        self._remember(key, copy.deepcopy(response))
+        self._write_disk(key, response)
+
+    def clear(self):
+        """Drop every cached transcript from memory and disk."""
+        with self._lock:
+            self.memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.unlink(os.path.join(self.cache_dir, name))
+
+    def _remember(self, key, response):
+        with self._lock:
+            self.memory[key] = response
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if not self.disk_entries:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as cache_file:
+                response = json.load(cache_file)
+            os.utime(path)  # Mark as recently used for eviction
+            return response
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, response):
+        if not self.disk_entries:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(response, cache_file)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        except (OSError, TypeError, ValueError):
+            pass  # The disk tier is best effort; the memory tier still holds the entry
+
+    def _evict_disk(self):
+        entries = []
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(".json"):
+                    entries.append((entry.stat().st_mtime, entry.path))
+        if len(entries) <= self.disk_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.disk_entries]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+# Shared process-wide transcript cache
+transcript_cache = TranscriptCache()
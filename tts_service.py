@@ -3,12 +3,24 @@ Text-to-Speech service for the VoiceBot application.
 Handles speech generation using Groq's PlayAI TTS API with Deepgram fallback.
 """
 
+import os
 import tempfile
 import base64
+import threading
+import time
 import streamlit as st
+import streamlit.components.v1 as components
 from groq import Groq
 from deepgram import DeepgramClient, SpeakOptions
-from config import GROQ_MODEL_TTS, GROQ_TTS_VOICE, DEEPGRAM_TTS_MODEL
+from audio_stream_server import get_audio_stream_server
+from metrics import metrics
+from config import (
+    GROQ_MODEL_TTS,
+    GROQ_TTS_VOICE,
+    DEEPGRAM_TTS_MODEL,
+    TTS_STREAM_CHUNK_SIZE,
+    TTS_STREAM_FIRST_CHUNK_TIMEOUT,
+)
 
 
 class TTSService:
@@ -33,6 +45,7 @@ class TTSService:
         """Generate speech from text using Groq PlayAI TTS with Deepgram fallback."""
         # Try Groq PlayAI TTS first
         try:
+            start = time.perf_counter()
             # Generate speech using Groq PlayAI TTS
             response = self.groq_client.audio.speech.create(
                 model=self.model,
@@ -46,6 +59,7 @@ class TTSService:
                 # Read the response content
                 audio_data = response.read()
                 tmp_file.write(audio_data)
+                metrics.record_timing("tts.total", time.perf_counter() - start)
                 return tmp_file.name
                 
         except Exception as e:
@@ -59,6 +73,79 @@ class TTSService:
             
             # Fallback to Deepgram TTS
             return self.generate_speech_deepgram(text)
+
+    def generate_speech_streaming(self, text):
+        """Start streaming Groq PlayAI TTS to the browser.
+
+        Returns (stream_url, stream, audio_file_path) once the first chunk has
+        arrived, or None if streaming is unavailable so the caller can fall back
+        to generate_speech. The full clip keeps being written to audio_file_path
+        in the background; wait on stream.wait_until_done() before reusing it.
+        """
+        server = get_audio_stream_server()
+        if server is None or self.groq_client is None:
+            return None
+
+        stream = server.create_stream("audio/mpeg")
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
+            audio_file_path = tmp_file.name
+
+        producer = threading.Thread(
+            target=self._stream_speech,
+            args=(text, stream, audio_file_path),
+            daemon=True
+        )
+        producer.start()
+
+        if not stream.wait_for_first_chunk(timeout=TTS_STREAM_FIRST_CHUNK_TIMEOUT):
+            # Nothing playable arrived; stop the producer and let the buffered path (and its fallback) handle it
+            metrics.increment("tts.first_chunk_timeout")
+            if not stream.cancel():
+                # The producer already finished without audio; its file is ours to remove.
+                # A cancelled producer removes the file itself when it stops.
+                if os.path.exists(audio_file_path):
+                    os.unlink(audio_file_path)
+            return None
+
+        return server.url_for(stream), stream, audio_file_path
+
+    def _stream_speech(self, text, stream, audio_file_path):
+        """Producer thread: forward provider chunks to the stream and the history file."""
+        start = time.perf_counter()
+        first_chunk_at = None
+        failed = False
+        try:
+            with self.groq_client.audio.speech.with_streaming_response.create(
+                model=self.model,
+                input=text,
+                voice=self.voice,
+                response_format="mp3"
+            ) as response, open(audio_file_path, "wb") as audio_file:
+                for chunk in response.iter_bytes(TTS_STREAM_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    if stream.cancelled:
+                        # Barge-in: stop pulling audio the user will never hear
+                        break
+                    if first_chunk_at is None:
+                        first_chunk_at = time.perf_counter()
+                        stream.first_byte_at = first_chunk_at
+                        stream.first_byte_seconds = first_chunk_at - start
+                        metrics.record_timing("tts.first_byte", stream.first_byte_seconds)
+                    audio_file.write(chunk)
+                    stream.append(chunk)
+        except Exception:
+            failed = True
+        finally:
+            if not failed and first_chunk_at is not None:
+                stream.total_seconds = time.perf_counter() - start
+            if stream.finish(failed=failed or first_chunk_at is None):
+                # The clip stops where the user interrupted; it is not kept for history
+                metrics.increment("tts.cancelled")
+                if os.path.exists(audio_file_path):
+                    os.unlink(audio_file_path)
+            elif stream.total_seconds is not None:
+                metrics.record_timing("tts.total", stream.total_seconds)
     
     def generate_speech_deepgram(self, text):
         """Generate speech from text using Deepgram TTS as fallback."""
@@ -84,7 +171,6 @@ class TTSService:
                 )
                 
                 # Check if the file was created successfully
-                import os
                 if os.path.exists(tmp_file.name) and os.path.getsize(tmp_file.name) > 0:
                     st.success("✅ Speech generated using Deepgram TTS")
                     return tmp_file.name
@@ -105,6 +191,24 @@ class TTSService:
         except Exception as e:
             st.error(f"Error playing audio: {str(e)}")
 
+    def play_audio_stream(self, stream_url):
+        """Play a progressively streamed clip; the browser starts as soon as bytes arrive."""
+        st.markdown(f"""
+        <audio controls autoplay preload="auto" src="{stream_url}" style="width: 100%; margin: 10px 0;">
+            Your browser does not support the audio element.
+        </audio>
+        """, unsafe_allow_html=True)
+
+    def stop_playback(self):
+        """Pause every audio element on the page (used when the user talks over the reply)."""
+        components.html("""
+        <script>
+        window.parent.document.querySelectorAll('audio').forEach(function(audio) {
+            audio.pause();
+        });
+        </script>
+        """, height=0)
+
     def play_audio_immediately(self, audio_file_path):
         """Play audio file immediately with JavaScript autoplay."""
         try: